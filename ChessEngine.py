@@ -3,10 +3,12 @@ Backwards-compatible facade re-exporting the engine modules.
 This keeps existing imports (from Chess import ChessEngine) working.
 """
 
-from .engine import GameState, Move, CastleRights
+from .engine import GameState, BitboardGameState, MailboxGameState, Move, CastleRights
 
 __all__ = [
     "GameState",
+    "BitboardGameState",
+    "MailboxGameState",
     "Move",
     "CastleRights",
 ]
@@ -1,88 +1,113 @@
+import atexit
+import multiprocessing
 import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+
+from .engine.movegen import iter_moves, is_tactical, mvv_lva
+from .engine.pst import PIECE_SCORES, MAX_PHASE
+from .engine.transposition import TranspositionTable, SharedTranspositionTable, EXACT, LOWER, UPPER
 
-# Base material scores
-PIECE_SCORES = {"K": 0, "Q": 900, "R": 500, "B": 330, "N": 320, "p": 100}
 CHECKMATE = 100000
 STALEMATE = 0
 DEPTH = 3
-
-
-
-# Piece-Square Tables (PST) for positional evaluation
-PST = {
-    'p': [  # Pawn
-        [0,   0,   0,   0,   0,   0,   0,   0],
-        [50,  50,  50,  50,  50,  50,  50,  50],
-        [10,  10,  20,  30,  30,  20,  10,  10],
-        [5,   5,  10,  25,  25,  10,   5,   5],
-        [0,   0,   0,  20,  20,   0,   0,   0],
-        [5,  -5, -10,   0,   0, -10,  -5,   5],
-        [5,  10,  10, -20, -20,  10,  10,   5],
-        [0,   0,   0,   0,   0,   0,   0,   0],
-    ],
-    'N': [  # Knight
-        [-50, -40, -30, -30, -30, -30, -40, -50],
-        [-40, -20,   0,   5,   5,   0, -20, -40],
-        [-30,   5,  10,  15,  15,  10,   5, -30],
-        [-30,   0,  15,  20,  20,  15,   0, -30],
-        [-30,   5,  15,  20,  20,  15,   5, -30],
-        [-30,   0,  10,  15,  15,  10,   0, -30],
-        [-40, -20,   0,   0,   0,   0, -20, -40],
-        [-50, -40, -30, -30, -30, -30, -40, -50],
-    ],
-    'B': [  # Bishop
-        [-20, -10, -10, -10, -10, -10, -10, -20],
-        [-10,   5,   0,   0,   0,   0,   5, -10],
-        [-10,  10,  10,  10,  10,  10,  10, -10],
-        [-10,   0,  10,  10,  10,  10,   0, -10],
-        [-10,   5,   5,  10,  10,   5,   5, -10],
-        [-10,   0,   5,  10,  10,   5,   0, -10],
-        [-10,   0,   0,   0,   0,   0,   0, -10],
-        [-20, -10, -10, -10, -10, -10, -10, -20],
-    ],
-    'R': [  # Rook
-        [0,   0,   5,  10,  10,   5,   0,   0],
-        [-5,   0,   0,   0,   0,   0,   0,  -5],
-        [-5,   0,   0,   0,   0,   0,   0,  -5],
-        [-5,   0,   0,   0,   0,   0,   0,  -5],
-        [-5,   0,   0,   0,   0,   0,   0,  -5],
-        [-5,   0,   0,   0,   0,   0,   0,  -5],
-        [5,  10,  10,  10,  10,  10,  10,   5],
-        [0,   0,   0,   0,   0,   0,   0,   0],
-    ],
-    'Q': [  # Queen
-        [-20, -10, -10,  -5,  -5, -10, -10, -20],
-        [-10,   0,   5,   0,   0,   0,   0, -10],
-        [-10,   5,   5,   5,   5,   5,   0, -10],
-        [ -5,   0,   5,   5,   5,   5,   0,  -5],
-        [  0,   0,   5,   5,   5,   5,   0,  -5],
-        [-10,   5,   5,   5,   5,   0,   0, -10],
-        [-10,   0,   5,   0,   0,   0,   0, -10],
-        [-20, -10, -10,  -5,  -5, -10, -10, -20],
-    ],
-    'K': [  # King (middlegame)
-        [-30, -40, -40, -50, -50, -40, -40, -30],
-        [-30, -40, -40, -50, -50, -40, -40, -30],
-        [-30, -40, -40, -50, -50, -40, -40, -30],
-        [-30, -40, -40, -50, -50, -40, -40, -30],
-        [-20, -30, -30, -40, -40, -30, -30, -20],
-        [-10, -20, -20, -20, -20, -20, -20, -10],
-        [ 20,  20,   0,   0,   0,   0,  20,  20],
-        [ 20,  30,  10,   0,   0,  10,  30,  20],
-    ]
-}
-
-# Endgame king table (when material is low)
-PST_KING_ENDGAME = [
-    [-50, -40, -30, -20, -20, -30, -40, -50],
-    [-30, -20, -10,   0,   0, -10, -20, -30],
-    [-30, -10,  20,  30,  30,  20, -10, -30],
-    [-30, -10,  30,  40,  40,  30, -10, -30],
-    [-30, -10,  30,  40,  40,  30, -10, -30],
-    [-30, -10,  20,  30,  30,  20, -10, -30],
-    [-30, -30,   0,   0,   0,   0, -30, -30],
-    [-50, -30, -30, -30, -30, -30, -30, -50],
-]
+TT_SIZE_MB = 16
+MAX_PLY = 64  # deepest ply that keeps killer moves
+NULL_MOVE_MIN_DEPTH = 3  # null-move pruning needs this much depth left
+LMR_MIN_DEPTH = 3  # late-move reductions need this much depth left...
+LMR_MIN_MOVES = 3  # ...and apply from the move after this many have been searched
+ASPIRATION_WINDOW = 50  # half-width of the first window around the previous iteration's score
+DELTA_MARGIN = 200  # quiescence skips captures that cannot lift the score to alpha even with this much to spare
+
+# How find_best_move(workers=N) uses its worker processes
+ROOT_SPLIT = "root"  # the root moves of each iteration are divided between the workers
+LAZY_SMP = "lazy"  # the workers search the whole tree alongside the caller, sharing one table
+
+# Shared by every search in this process; results stay valid between moves
+transposition_table = TranspositionTable(TT_SIZE_MB)
+
+# perf_counter() time at which a timed search gives up, None when untimed
+_deadline = None
+
+# Move ordering state, cleared by find_best_move: the last two quiet moves that
+# caused a cutoff at each ply, and a history score per piece and target square
+killers = [[None, None] for _ in range(MAX_PLY)]
+history = {color + piece: [0] * 64 for color in "wb" for piece in "pNBRQK"}
+
+# Counters of the current search, reset by find_best_move: nodes searched by negamax
+# and by quiescence, the deepest ply reached, cutoffs and how many of them came from
+# the first move tried
+nodes = 0
+qnodes = 0
+seldepth = 0
+cutoffs = 0
+first_move_cutoffs = 0
+worker_tt_hits = 0  # transposition table hits of ROOT_SPLIT workers
+
+# Expected line of play from the last find_best_move, the chosen move first
+principal_variation = []
+
+# Worker pool for find_best_move(workers=N), reused between calls. _shared_best is
+# the best root score found so far in the current iteration, visible to every worker;
+# _stop, once set, times out every search that has a deadline; _shared_table is
+# the transposition table of the workers (and of the caller in LAZY_SMP mode).
+# search_id tells workers when a new find_best_move call has started.
+_pool = None
+_pool_workers = 0
+_shared_best = None
+_stop = None
+_shared_table = None
+search_id = 0
+_worker_search_id = None
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when find_best_move's time budget is spent"""
+
+
+# One completed iteration of find_best_move: score from the side to move's point of
+# view, nodes (negamax and quiescence) and seconds spent on it, principal variation
+Iteration = namedtuple("Iteration", "depth score nodes seconds pv")
+
+
+class SearchStats:
+    """What a find_best_move call did (counting ROOT_SPLIT workers, not LAZY_SMP helpers), updated every iteration"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forget everything recorded, as find_best_move does when it starts"""
+        self.depth = 0
+        self.seldepth = 0
+        self.score = None
+        self.nodes = 0
+        self.qnodes = 0
+        self.tt_hits = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.elapsed = 0.0
+        self.pv = []
+        self.iterations = []
+
+    @property
+    def nps(self):
+        """Nodes (negamax and quiescence) per second"""
+        return int((self.nodes + self.qnodes) / self.elapsed) if self.elapsed else 0
+
+    @property
+    def first_move_cutoff_rate(self):
+        """Fraction of cutoffs caused by the first move tried, a measure of move ordering quality"""
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def __str__(self):
+        """UCI style info line"""
+        line = (f"depth {self.depth} seldepth {self.seldepth} score cp {self.score} "
+                f"nodes {self.nodes + self.qnodes} nps {self.nps} time {int(self.elapsed * 1000)}")
+        if self.pv:
+            line += " pv " + " ".join(move.get_chess_move_notation() for move in self.pv)
+        return line
 
 
 def find_random_move(valid_moves):
@@ -92,151 +117,496 @@ def find_random_move(valid_moves):
     return valid_moves[random.randint(0, len(valid_moves) - 1)]
 
 
-def is_endgame(gs):
-    """Determine if we're in endgame based on material count."""
-    total_material = 0
-    for row in gs.board:
-        for square in row:
-            if square != '--':
-                piece = square[1]
-                if piece != 'K':  
-                    total_material += PIECE_SCORES.get(piece, 0)
-    return total_material < 1300  
-
-
 def evaluate_position(gs):
-    """Evaluate the current position."""
-    
-    if gs.checkMate:
-        return -CHECKMATE if gs.whiteToMove else CHECKMATE
-    if gs.staleMate:
-        return STALEMATE
-
-    score = 0
-    endgame = is_endgame(gs)
-    
-    
-    for r, row in enumerate(gs.board):
-        for c, square in enumerate(row):
-            if square == '--':
-                continue
-            
-            color = 1 if square[0] == 'w' else -1
-            piece = square[1]
-            
-            # Material value
-            base_score = PIECE_SCORES[piece]
-            
-            
-            pst_table = PST.get(piece)
-            if pst_table:
-                if color == 1:  # White
-                    pst_bonus = pst_table[r][c]
-                else:  # Black (mirror the table)
-                    pst_bonus = pst_table[7 - r][c]
-            else:
-                pst_bonus = 0
-            
-            
-            if piece == 'K' and endgame:
-                if color == 1:
-                    pst_bonus = PST_KING_ENDGAME[r][c]
-                else:
-                    pst_bonus = PST_KING_ENDGAME[7 - r][c]
-            
-            score += color * (base_score + pst_bonus)
-    
-    return score
-
-
-def minimax_alpha_beta(gs, valid_moves, depth, alpha, beta, white_to_move):
-    """Minimax with alpha-beta pruning."""
-    
-    if gs.checkMate:
-        return (-CHECKMATE if white_to_move else CHECKMATE), None
-    if gs.staleMate:
-        return STALEMATE, None
-    if depth == 0:
-        return evaluate_position(gs), None
-
+    """Static score from White's side: material + PST, blended between middlegame and endgame by game phase"""
+
+    # The sums are kept up to date by make_move; mates and stalemates are scored by the search
+    phase = min(gs.phase, MAX_PHASE)  # promotions can push it past the starting total
+    return (gs.mgScore * phase + gs.egScore * (MAX_PHASE - phase)) // MAX_PHASE
+
+
+def negamax(gs, depth, alpha, beta, ply, pv):
+    """Principal variation search from the side to move's point of view; fills pv with the best line"""
+    global nodes
+    if _deadline is not None and (time.perf_counter() >= _deadline or _stop is not None and _stop.value):
+        raise SearchTimeout
+
+    pv.clear()
+    if depth <= 0:
+        return quiescence(gs, alpha, beta, ply)
+    nodes += 1  # horizon nodes are counted by quiescence
+
+    # Only null-window nodes return a stored score, so the principal variation is always searched out
+    hash_move = None
+    entry = transposition_table.probe(gs.hash)
+    if entry is not None:
+        entry_depth, entry_score, flag, move_id = entry
+        hash_move = move_id or None
+        if entry_depth >= depth and beta - alpha == 1:
+            if (flag == EXACT or (flag == LOWER and entry_score >= beta)
+                    or (flag == UPPER and entry_score <= alpha)):
+                return entry_score
+    alpha_orig = alpha
+    in_check = gs.in_check()
+    child_pv = []
+
+    # Null move: if passing still holds beta, a real move would too. Not in
+    # check, not twice in a row, and not with only pawns left (zugzwang).
+    if (depth >= NULL_MOVE_MIN_DEPTH and beta - alpha == 1 and not in_check
+            and gs.moveLog and gs.moveLog[-1] is not None
+            and side_to_move_score(gs) >= beta and gs.has_non_pawn_material()):
+        reduction = 3 if depth >= 6 else 2
+        gs.make_null_move()
+        score = -negamax(gs, depth - 1 - reduction, -beta, -beta + 1, ply + 1, child_pv)
+        gs.undo_null_move()
+        if score >= beta:
+            return beta
+
+    # Moves come in stages, so a cutoff skips the rest of the generation: the hash
+    # move, captures by MVV-LVA, this ply's killers, then quiet moves by history
+    ply_killers = killers[ply] if ply < MAX_PLY else ()
+    best_score = -CHECKMATE
     best_move = None
-    
-    if white_to_move: 
-        max_eval = -CHECKMATE
-        for move in valid_moves:
-            gs.make_move(move)
-            next_moves = gs.get_valid_moves()
-            eval_score, _ = minimax_alpha_beta(gs, next_moves, depth - 1, alpha, beta, False)
-            gs.undo_move()
-
-            if eval_score > max_eval:
-                max_eval = eval_score
-                best_move = move
-
-            alpha = max(alpha, eval_score)
-            if beta <= alpha:  # Beta cutoff
-                break
-        
-        return max_eval, best_move
-    
-    else:  # Minimizing player
-        min_eval = CHECKMATE
-        for move in valid_moves:
-            gs.make_move(move)
-            next_moves = gs.get_valid_moves()
-            eval_score, _ = minimax_alpha_beta(gs, next_moves, depth - 1, alpha, beta, True)
-            gs.undo_move()
-
-            if eval_score < min_eval:
-                min_eval = eval_score
-                best_move = move
-
-            beta = min(beta, eval_score)
-            if beta <= alpha:  # Alpha cutoff
-                break
-        
-        return min_eval, best_move
+    searched = 0
+    for move in iter_moves(gs, hash_move, killers=ply_killers, history=history):
+        searched += 1
+        gs.make_move(move)
+        if searched == 1:
+            score = -negamax(gs, depth - 1, -beta, -alpha, ply + 1, child_pv)
+        else:
+            # Later moves only have to be proven no better than alpha, which a null window
+            # does cheaply. Late quiet moves are first searched one or two plies shallower.
+            # A move that beats alpha is searched again at full depth, then with the full window.
+            reduction = 0
+            if (searched > LMR_MIN_MOVES and depth >= LMR_MIN_DEPTH and not in_check
+                    and not is_tactical(move) and move not in ply_killers and not gs.in_check()):
+                reduction = 2 if searched > 2 * LMR_MIN_MOVES and depth >= 6 else 1
+            score = -negamax(gs, depth - 1 - reduction, -alpha - 1, -alpha, ply + 1, child_pv)
+            if reduction and score > alpha:
+                score = -negamax(gs, depth - 1, -alpha - 1, -alpha, ply + 1, child_pv)
+            if alpha < score < beta:
+                score = -negamax(gs, depth - 1, -beta, -alpha, ply + 1, child_pv)
+        gs.undo_move()
 
+        if score > best_score:
+            best_score = score
+            best_move = move
+            if score > alpha:
+                alpha = score
+                pv[:] = [move] + child_pv
+                if alpha >= beta:
+                    record_cutoff(move, depth, ply, searched)
+                    break
+
+    if not searched:  # No legal move
+        return -CHECKMATE if in_check else STALEMATE
+    store_result(gs, depth, best_score, alpha_orig, beta, best_move)
+    return best_score
+
+
+def side_to_move_score(gs):
+    """evaluate_position from the side to move's point of view"""
+    score = evaluate_position(gs)
+    return score if gs.whiteToMove else -score
+
+
+def record_cutoff(move, depth, ply, searched):
+    """Count a cutoff by the searched-th move and let a quiet cutting move rank higher elsewhere"""
+    global cutoffs, first_move_cutoffs
+    cutoffs += 1
+    if searched == 1:
+        first_move_cutoffs += 1
+    if is_tactical(move):
+        return  # captures are already ordered by MVV-LVA
+    if ply < MAX_PLY:
+        slots = killers[ply]
+        if slots[0] != move:
+            slots[1] = slots[0]
+            slots[0] = move
+    history[move.pieceMoved][move.endRow * 8 + move.endCol] += depth * depth
+
+
+def clear_move_ordering():
+    """Forget the killer moves and history scores of previous searches"""
+    for slots in killers:
+        slots[0] = slots[1] = None
+    for scores in history.values():
+        scores[:] = [0] * 64
+
+
+def reset_counters():
+    """Zero the node, depth and cutoff counters"""
+    global nodes, qnodes, seldepth, cutoffs, first_move_cutoffs, worker_tt_hits
+    nodes = qnodes = seldepth = cutoffs = first_move_cutoffs = worker_tt_hits = 0
+
+
+def store_result(gs, depth, score, alpha, beta, best_move):
+    """Save a node's score in the transposition table with the bound it proves for the window it was searched with"""
+    if score <= alpha:
+        flag = UPPER
+    elif score >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    transposition_table.store(gs.hash, depth, score, flag, best_move.moveID if best_move is not None else 0)
+
+
+def quiescence(gs, alpha, beta, ply=0):
+    """Search captures, promotions and check evasions beyond the horizon, from the side to move's point of view"""
+    global qnodes, seldepth
+    if _deadline is not None and (time.perf_counter() >= _deadline or _stop is not None and _stop.value):
+        raise SearchTimeout
+    qnodes += 1
+    if ply > seldepth:
+        seldepth = ply
+
+    if gs.in_check():
+        # Every evasion has to be looked at, and having none is mate
+        moves = gs.get_capture_moves() + gs.get_quiet_moves()
+        if not moves:
+            return -CHECKMATE
+        stand_pat = None
+        best = -CHECKMATE
+    else:
+        # The side to move may stand pat on the static score, which ends most leaves,
+        # so nothing is generated before this test
+        stand_pat = side_to_move_score(gs)
+        if stand_pat >= beta:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+        moves = gs.get_capture_moves()
+        if not moves and not gs.has_legal_move():  # a cheap probe tells stalemate apart
+            return STALEMATE
+        best = stand_pat
+
+    for move in sorted(moves, key=mvv_lva):
+        # Delta pruning: skip captures that cannot reach alpha even if the piece came for free
+        if stand_pat is not None:
+            gain = PIECE_SCORES[move.pieceCaptured[1]] if move.pieceCaptured != '--' else 0
+            if move.isPawnPromotion:
+                gain += PIECE_SCORES[move.promotionPiece] - PIECE_SCORES['p']
+            if stand_pat + gain + DELTA_MARGIN <= alpha:
+                continue
 
-def move_ordering_key(move):
-    """Key function for move ordering (captures first)."""
-    if hasattr(move, 'pieceCaptured') and move.pieceCaptured != '--':
-        return -PIECE_SCORES.get(move.pieceCaptured[1], 0)
-    return 0
+        gs.make_move(move)
+        score = -quiescence(gs, -beta, -alpha, ply + 1)
+        gs.undo_move()
 
+        if score > best:
+            best = score
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+    return best
 
-def find_best_move(gs, depth=DEPTH):
-    """Find the best move using minimax with alpha-beta pruning."""
 
-        
-    valid_moves = gs.get_valid_moves()
-    if not valid_moves:
-        return None
-    
-    # Order moves (captures first for better alpha-beta pruning)
-    ordered_moves = sorted(valid_moves, key=move_ordering_key)
-    
-    best_score = -CHECKMATE if gs.whiteToMove else CHECKMATE
+def search_root(gs, ordered_moves, depth, alpha=-CHECKMATE, beta=CHECKMATE):
+    """Score the root moves inside (alpha, beta); returns (best score, moves sharing it, {move: score}, pv)"""
+    best_score = -CHECKMATE
     best_moves = []
+    scores = {}
+    pv = []
+    child_pv = []
 
     for move in ordered_moves:
         gs.make_move(move)
-        next_moves = gs.get_valid_moves()
-        score, _ = minimax_alpha_beta(gs, next_moves, depth - 1, -CHECKMATE, CHECKMATE, not gs.whiteToMove)
+        if not best_moves:
+            score = -negamax(gs, depth - 1, -beta, -alpha, 1, child_pv)
+        else:
+            # A null window just below the best score: only moves that can tie or beat it get
+            # an exact score, the others an upper bound (as is a best score outside the window)
+            floor = max(alpha, best_score - 1)
+            score = -negamax(gs, depth - 1, -floor - 1, -floor, 1, child_pv)
+            if floor < score < beta:
+                score = -negamax(gs, depth - 1, -beta, -floor, 1, child_pv)
         gs.undo_move()
-        
-        if gs.whiteToMove:  # Maximizing
-            if score > best_score:
-                best_score = score
-                best_moves = [move]
-            elif score == best_score:
-                best_moves.append(move)
-        else:  # Minimizing
-            if score < best_score:
-                best_score = score
-                best_moves = [move]
-            elif score == best_score:
-                best_moves.append(move)
+        scores[move] = score
+
+        if score > best_score or not best_moves:
+            best_score = score
+            best_moves = [move]
+            pv = [move] + child_pv
+        elif score == best_score:
+            best_moves.append(move)
+
+    return best_score, best_moves, scores, pv
+
+
+def aspiration_search(gs, ordered_moves, depth, previous_score=None):
+    """search_root inside a window around previous_score, widened on the failing side until the score lands inside"""
+    alpha, beta = -CHECKMATE, CHECKMATE
+    window = ASPIRATION_WINDOW
+    if previous_score is not None and -CHECKMATE < previous_score < CHECKMATE:
+        alpha = max(-CHECKMATE, previous_score - window)
+        beta = min(CHECKMATE, previous_score + window)
+    while True:
+        result = search_root(gs, ordered_moves, depth, alpha, beta)
+        score = result[0]
+        if score <= alpha and alpha > -CHECKMATE:
+            alpha = max(-CHECKMATE, alpha - window)
+        elif score >= beta and beta < CHECKMATE:
+            beta = min(CHECKMATE, beta + window)
+        else:
+            return result
+        window *= 2
+
+
+def get_pool(workers):
+    """The process pool used by find_best_move(workers=N), created on first use and kept between calls"""
+    global _pool, _pool_workers, _shared_best, _stop, _shared_table
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        _shared_best = multiprocessing.Value('i', -CHECKMATE)
+        _stop = multiprocessing.RawValue('b', 0)
+        _shared_table = SharedTranspositionTable(TT_SIZE_MB)
+        _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                    initargs=(_shared_best, _stop, _shared_table))
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool():
+    """Stop the worker processes, if any, and free their shared table; the next parallel search starts new ones"""
+    global _pool, _pool_workers, _stop, _shared_table
+    if _pool is not None:
+        _pool.shutdown(wait=True)  # searches wait for their own tasks, so none are pending
+        _shared_table.unlink()
+        _pool = _stop = _shared_table = None
+        _pool_workers = 0
+
+
+atexit.register(shutdown_pool)
+
+
+def _stop_tasks(futures):
+    """Cancel the tasks not yet started, make the running ones time out and wait until they have"""
+    for future in futures:
+        future.cancel()
+    _stop.value = 1
+    wait(futures)
+    _stop.value = 0
+
+
+def _local_deadline(deadline):
+    """perf_counter() time of deadline, a time.time() shared by all processes (None: untimed)"""
+    if deadline is None:
+        return None
+    return time.perf_counter() + (deadline - time.time())
+
+
+def _wall_deadline(deadline):
+    """time.time() of a perf_counter() deadline, to hand to other processes (None: untimed)"""
+    if deadline is None:
+        return None
+    return time.time() + (deadline - time.perf_counter())
+
+
+def _init_worker(shared_best, stop, table):
+    global _shared_best, _stop, transposition_table
+    _shared_best = shared_best
+    _stop = stop
+    transposition_table = table
+
+
+def _search_root_move(backend, snapshot, move_id, depth, null_window, deadline, search_id):
+    """Worker task: (score, pv moveIDs, counters) of one root move, or None once deadline (a time.time()) passes"""
+    global _deadline, _worker_search_id
+    if search_id != _worker_search_id:
+        clear_move_ordering()  # killers and history of another game position
+        _worker_search_id = search_id
+    gs = backend.from_snapshot(snapshot)
+    move = next(move for move in gs.generate_legal_moves() if move.moveID == move_id)
+    _deadline = _local_deadline(deadline)
+    reset_counters()
+    tt_hits = transposition_table.hits
+    pv = []
+    try:
+        gs.make_move(move)
+        if null_window:
+            # As in search_root, against the best score any worker has found so far
+            floor = _shared_best.value - 1
+            score = -negamax(gs, depth - 1, -floor - 1, -floor, 1, pv)
+            if score > floor:
+                score = -negamax(gs, depth - 1, -CHECKMATE, -floor, 1, pv)
+        else:
+            score = -negamax(gs, depth - 1, -CHECKMATE, CHECKMATE, 1, pv)
+    except SearchTimeout:
+        return None
+    finally:
+        _deadline = None
+    counters = (nodes, qnodes, seldepth, cutoffs, first_move_cutoffs, transposition_table.hits - tt_hits)
+    return score, [move_id] + [child.moveID for child in pv], counters
+
+
+def search_root_parallel(gs, ordered_moves, depth, workers, deadline=None):
+    """search_root with one root move per worker task; raises SearchTimeout once deadline (a time.time()) passes"""
+    global nodes, qnodes, seldepth, cutoffs, first_move_cutoffs, worker_tt_hits
+    pool = get_pool(workers)
+    backend = type(gs)
+    snapshot = gs.snapshot()
+
+    def submit(move, null_window):
+        return pool.submit(_search_root_move, backend, snapshot, move.moveID, depth, null_window,
+                           deadline, search_id)
+
+    # The first move alone sets the best score (young brothers wait); the others
+    # then run side by side, each starting from the best score known at pickup
+    result = submit(ordered_moves[0], False).result()
+    if result is None:
+        raise SearchTimeout
+    results = {ordered_moves[0]: result}
+    _shared_best.value = result[0]
+
+    futures = {submit(move, True): move for move in ordered_moves[1:]}
+    for future in as_completed(futures):
+        result = future.result()
+        if result is None:
+            _stop_tasks(futures)
+            raise SearchTimeout
+        results[futures[future]] = result
+        with _shared_best.get_lock():
+            if result[0] > _shared_best.value:
+                _shared_best.value = result[0]
+
+    for _, _, counters in results.values():
+        nodes += counters[0]
+        qnodes += counters[1]
+        seldepth = max(seldepth, counters[2])
+        cutoffs += counters[3]
+        first_move_cutoffs += counters[4]
+        worker_tt_hits += counters[5]
+
+    scores = {move: results[move][0] for move in ordered_moves}
+    best_score = max(scores.values())
+    best_moves = [move for move in ordered_moves if scores[move] == best_score]
+    return best_score, best_moves, scores, replay_line(gs, results[best_moves[0]][1])
+
+
+def replay_line(gs, move_ids):
+    """The Move objects for a line of moveIDs played from gs (which is left unchanged)"""
+    line = []
+    for move_id in move_ids:
+        move = next((move for move in gs.generate_legal_moves() if move.moveID == move_id), None)
+        if move is None:
+            break
+        gs.make_move(move)
+        line.append(move)
+    for _ in line:
+        gs.undo_move()
+    return line
+
+
+def _lazy_helper(backend, snapshot, max_depth, deadline, search_id, index):
+    """Worker task for LAZY_SMP: search snapshot by iterative deepening until stopped, filling the shared table"""
+    global _deadline, _worker_search_id
+    if search_id != _worker_search_id:
+        clear_move_ordering()
+        _worker_search_id = search_id
+    gs = backend.from_snapshot(snapshot)
+    # Each helper starts from a different root move and odd ones run a ply ahead,
+    # so the helpers spread over the tree instead of repeating each other's work
+    ordered_moves = sorted(gs.generate_legal_moves(), key=mvv_lva)
+    shift = index % len(ordered_moves)
+    ordered_moves = ordered_moves[shift:] + ordered_moves[:shift]
+    _deadline = _local_deadline(deadline) if deadline is not None else float("inf")
+    try:
+        for depth in range(1 + index % 2, max_depth + 2):
+            _, _, scores, _ = search_root(gs, ordered_moves, depth)
+            ordered_moves.sort(key=lambda move: -scores[move])
+    except SearchTimeout:
+        pass
+    finally:
+        _deadline = None
+
+
+def find_best_move(gs, *, time_limit=None, max_depth=DEPTH, workers=None, mode=ROOT_SPLIT,
+                   stats=None, on_iteration=None):
+    """Find the best move by iterative deepening up to max_depth plies, or until time_limit seconds pass"""
+    global _deadline, principal_variation, search_id, transposition_table
+
+    valid_moves = gs.generate_legal_moves()
+    if not valid_moves:
+        return None
+
+    clear_move_ordering()
+    reset_counters()
+    principal_variation = []
+    search_id += 1
+    if stats is not None:
+        stats.reset()
+    elif on_iteration is not None:
+        stats = SearchStats()
+
+    # ROOT_SPLIT spreads each iteration's root moves over the workers. LAZY_SMP has the
+    # workers search alongside this one at staggered depths, all sharing one table in
+    # shared memory, so this search finds much of its tree already scored.
+    parallel = workers is not None and workers > 1 and mode == ROOT_SPLIT
+    helpers = []
+    private_table = transposition_table
+    if workers is not None and workers > 1 and mode == LAZY_SMP:
+        pool = get_pool(workers)
+        snapshot = gs.snapshot()
+        deadline = time.time() + time_limit if time_limit is not None else None
+        helpers = [pool.submit(_lazy_helper, type(gs), snapshot, max_depth, deadline, search_id, index)
+                   for index in range(workers)]
+        transposition_table = _shared_table
+
+    # Order moves (captures first for better alpha-beta pruning), the stored best move before all
+    ordered_moves = sorted(valid_moves, key=mvv_lva)
+    entry = transposition_table.probe(gs.hash)
+    if entry is not None and entry[3]:
+        ordered_moves.sort(key=lambda move: move.moveID != entry[3])
+
+    start = time.perf_counter()
+    root_ply = len(gs.moveLog)
+    best_moves = []
+    best_score = None
+    tt_hits = transposition_table.hits
+    counted = 0  # nodes up to the previous iteration
+    try:
+        for depth in range(1, max_depth + 1):
+            iteration_start = time.perf_counter()
+            # Root moves go in the previous iteration's order. The serial search uses an aspiration
+            # window around its score; the parallel one still scores every best-move candidate exactly.
+            if parallel:
+                result = search_root_parallel(gs, ordered_moves, depth, workers, _wall_deadline(_deadline))
+            else:
+                result = aspiration_search(gs, ordered_moves, depth, best_score)
+            best_score, best_moves, scores, principal_variation = result
+            transposition_table.store(gs.hash, depth, best_score, EXACT, best_moves[0].moveID)
+            # principal_variation keeps the expected line; stats, if any, is updated and handed to on_iteration
+            if stats is not None:
+                now = time.perf_counter()
+                stats.depth, stats.seldepth, stats.score, stats.pv = depth, seldepth, best_score, principal_variation
+                stats.nodes, stats.qnodes = nodes, qnodes
+                stats.cutoffs, stats.first_move_cutoffs = cutoffs, first_move_cutoffs
+                stats.tt_hits = transposition_table.hits - tt_hits + worker_tt_hits
+                stats.elapsed = now - start
+                stats.iterations.append(Iteration(depth, best_score, nodes + qnodes - counted,
+                                                  now - iteration_start, principal_variation))
+                counted = nodes + qnodes
+                if on_iteration is not None:
+                    on_iteration(stats)
+            if best_score == CHECKMATE:
+                break  # A forced mate cannot get any better
+            if time_limit is not None:
+                if time.perf_counter() - start >= time_limit:
+                    break
+                _deadline = start + time_limit  # depth 1 always completes; deeper ones may be cut off
+            ordered_moves.sort(key=lambda move: -scores[move])
+    except SearchTimeout:
+        # Unwind the moves (and passes) the interrupted iteration left on the board
+        while len(gs.moveLog) > root_ply:
+            if gs.moveLog[-1] is None:
+                gs.undo_null_move()
+            else:
+                gs.undo_move()
+    finally:
+        _deadline = None
+        if helpers:
+            _stop_tasks(helpers)
+            transposition_table = private_table
 
     if not best_moves:
         return random.choice(valid_moves)
@@ -261,8 +631,4 @@ def find_best_move(gs, depth=DEPTH):
         if filtered_moves:
             best_moves = filtered_moves
 
-    return best_moves[0] if best_moves else valid_moves[0]
-
-
-
-
+    return best_moves[0]
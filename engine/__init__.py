@@ -3,13 +3,19 @@ Engine package exposing core chess entities.
 """
 
 from .game_state import GameState
+from .bitboard import BitboardGameState
+from .mailbox import MailboxGameState
 from .move import Move
 from .castling import CastleRights
+from .snapshot import Snapshot
 
 __all__ = [
     "GameState",
+    "BitboardGameState",
+    "MailboxGameState",
     "Move",
     "CastleRights",
+    "Snapshot",
 ]
 
 
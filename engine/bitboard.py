@@ -0,0 +1,692 @@
+"""
+BitboardGameState: same public API as GameState, but the position is kept in
+twelve 64-bit piece sets and legal moves are generated with shifts and masks.
+
+Squares are numbered row * 8 + col like the rest of the engine (bit 0 is a8,
+bit 63 is h1), so white pawns advance towards lower bits.
+"""
+
+import copy
+
+from .castling import CastleRights, WKS, WQS, BKS, BQS, CASTLE_MASK
+from .fen import parse_fen
+from .game_state import GameState
+from .move import Move, PROMOTION_PIECES
+from .pst import MG_SCORES, EG_SCORES, PHASE, score_board
+from .snapshot import Snapshot, pack_squares, unpack_snapshot
+from .zobrist import PIECE_KEYS, SIDE_KEY, CASTLE_KEYS, EP_KEYS, castle_bits, compute_hash
+
+
+FULL = (1 << 64) - 1
+FILE_A = sum(1 << (r * 8) for r in range(8))
+FILE_H = FILE_A << 7
+NOT_FILE_A = FULL ^ FILE_A
+NOT_FILE_H = FULL ^ FILE_H
+ROW_3 = 0xFF << 40  # white pawns land here after a single push
+ROW_6 = 0xFF << 16  # black pawns land here after a single push
+PROMOTION_ROWS = 0xFF | 0xFF << 56
+
+SQUARES = [(r, c) for r in range(8) for c in range(8)]  # square index -> (row, col)
+
+# Squares that must be empty / not attacked for each castle
+WKS_EMPTY = WKS_SAFE = 0x60 << 56       # f1 g1
+WQS_EMPTY, WQS_SAFE = 0x0E << 56, 0x0C << 56  # b1 c1 d1 / c1 d1
+BKS_EMPTY = BKS_SAFE = 0x60             # f8 g8
+BQS_EMPTY, BQS_SAFE = 0x0E, 0x0C        # b8 c8 d8 / c8 d8
+
+PIECE_NAMES = {True: ("wp", "wN", "wB", "wR", "wQ", "wK"),
+               False: ("bp", "bN", "bB", "bR", "bQ", "bK")}
+
+
+def _ray(sq, dr, dc):
+    r, c = SQUARES[sq]
+    bits = 0
+    r += dr
+    c += dc
+    while 0 <= r < 8 and 0 <= c < 8:
+        bits |= 1 << (r * 8 + c)
+        r += dr
+        c += dc
+    return bits
+
+
+def _jumps(sq, offsets):
+    r, c = SQUARES[sq]
+    bits = 0
+    for dr, dc in offsets:
+        if 0 <= r + dr < 8 and 0 <= c + dc < 8:
+            bits |= 1 << ((r + dr) * 8 + c + dc)
+    return bits
+
+
+# Rays towards higher square indexes ("positive") stop at the lowest blocker,
+# rays towards lower indexes stop at the highest one.
+RAY_N = [_ray(sq, -1, 0) for sq in range(64)]
+RAY_S = [_ray(sq, 1, 0) for sq in range(64)]
+RAY_W = [_ray(sq, 0, -1) for sq in range(64)]
+RAY_E = [_ray(sq, 0, 1) for sq in range(64)]
+RAY_NW = [_ray(sq, -1, -1) for sq in range(64)]
+RAY_NE = [_ray(sq, -1, 1) for sq in range(64)]
+RAY_SW = [_ray(sq, 1, -1) for sq in range(64)]
+RAY_SE = [_ray(sq, 1, 1) for sq in range(64)]
+
+KNIGHT_ATTACKS = [_jumps(sq, [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)])
+                  for sq in range(64)]
+KING_ATTACKS = [_jumps(sq, [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)])
+                for sq in range(64)]
+# PAWN_ATTACKS[white][sq]: squares attacked by a pawn of that colour standing on sq
+PAWN_ATTACKS = {True: [_jumps(sq, [(-1, -1), (-1, 1)]) for sq in range(64)],
+                False: [_jumps(sq, [(1, -1), (1, 1)]) for sq in range(64)]}
+
+ROOK_EMPTY = [RAY_N[sq] | RAY_S[sq] | RAY_W[sq] | RAY_E[sq] for sq in range(64)]
+BISHOP_EMPTY = [RAY_NW[sq] | RAY_NE[sq] | RAY_SW[sq] | RAY_SE[sq] for sq in range(64)]
+
+
+def _build_lines():
+    between = [[0] * 64 for _ in range(64)]
+    line = [[0] * 64 for _ in range(64)]
+    pairs = [(RAY_N, RAY_S), (RAY_W, RAY_E), (RAY_NW, RAY_SE), (RAY_NE, RAY_SW)]
+    for a in range(64):
+        for ray, opposite in pairs:
+            for table in (ray, opposite):
+                bits = table[a]
+                while bits:
+                    low = bits & -bits
+                    b = low.bit_length() - 1
+                    bits ^= low
+                    between[a][b] = table[a] & ~table[b] & ~low
+                    line[a][b] = ray[a] | opposite[a] | (1 << a)
+    return between, line
+
+
+BETWEEN, LINE = _build_lines()
+
+
+def rook_attacks(sq, occ):
+    """Rook attack set from sq given the occupancy"""
+    ray = RAY_N[sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= RAY_N[blockers.bit_length() - 1]
+    attacks = ray
+    ray = RAY_W[sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= RAY_W[blockers.bit_length() - 1]
+    attacks |= ray
+    ray = RAY_S[sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= RAY_S[(blockers & -blockers).bit_length() - 1]
+    attacks |= ray
+    ray = RAY_E[sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= RAY_E[(blockers & -blockers).bit_length() - 1]
+    return attacks | ray
+
+
+def bishop_attacks(sq, occ):
+    """Bishop attack set from sq given the occupancy"""
+    ray = RAY_NW[sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= RAY_NW[blockers.bit_length() - 1]
+    attacks = ray
+    ray = RAY_NE[sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= RAY_NE[blockers.bit_length() - 1]
+    attacks |= ray
+    ray = RAY_SW[sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= RAY_SW[(blockers & -blockers).bit_length() - 1]
+    attacks |= ray
+    ray = RAY_SE[sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= RAY_SE[(blockers & -blockers).bit_length() - 1]
+    return attacks | ray
+
+
+class BitboardGameState:
+    def __init__(self):
+        self.bitboards = {}
+        self.squares = ["--"] * 64
+        self.occupancy = [0, 0]  # indexed by colour: [black, white]
+        self.whiteKingSq = 60
+        self.blackKingSq = 4
+        self._load_board(GameState().board)
+
+        self.checkMate = False
+        self.staleMate = False
+        self.inCheck = False
+
+        self.whiteToMove = True
+        self.moveLog = []
+        self.castling = WKS | WQS | BKS | BQS
+        self.epSquare = -1
+        self.halfmoveClock = 0
+        self.history = []  # (castling, epSquare, halfmoveClock, hash, mgScore, egScore, phase) per ply
+
+        self.positionCounts = {}
+        self.drawBy50Move = False
+        self.drawByRepetition = False
+
+        self.hash = compute_hash(self.board, self.whiteToMove, self.currentCastlingRights, self.enpassantPossible)
+        self.update_position_count()
+
+    @classmethod
+    def from_fen(cls, fen):
+        """Create a game state from a FEN string"""
+        return cls._from_position(*parse_fen(fen))
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Create a game state from a Snapshot (taken from any backend); the move history starts empty"""
+        return cls._from_position(*unpack_snapshot(snapshot))
+
+    @classmethod
+    def _from_position(cls, board, whiteToMove, rights, enpassant, halfmoveClock):
+        gs = cls()
+        gs._load_board(board)
+        gs.whiteToMove = whiteToMove
+        gs.castling = castle_bits(rights)
+        gs.epSquare = enpassant[0] * 8 + enpassant[1] if enpassant else -1
+        gs.halfmoveClock = halfmoveClock
+        gs.hash = compute_hash(board, whiteToMove, rights, enpassant)
+        gs.positionCounts = {}
+        gs.update_position_count()
+        return gs
+
+    def snapshot(self):
+        """Compact immutable copy of the current position (see engine.snapshot)"""
+        return Snapshot(pack_squares(self.squares), self.whiteToMove, self.castling,
+                        self.epSquare, self.halfmoveClock, self.hash)
+
+    def clone(self):
+        """Independent copy that can make and undo moves without touching this one.
+
+        Only the containers are copied; logged moves and history tuples are
+        immutable and shared by both states.
+        """
+        gs = copy.copy(self)
+        gs.bitboards = dict(self.bitboards)
+        gs.squares = list(self.squares)
+        gs.occupancy = list(self.occupancy)
+        gs.moveLog = list(self.moveLog)
+        gs.history = list(self.history)
+        gs.positionCounts = dict(self.positionCounts)
+        return gs
+
+    def _load_board(self, board):
+        for piece in PIECE_NAMES[True] + PIECE_NAMES[False]:
+            self.bitboards[piece] = 0
+        self.occupancy = [0, 0]
+        for sq, (r, c) in enumerate(SQUARES):
+            piece = board[r][c]
+            self.squares[sq] = piece
+            if piece != "--":
+                self.bitboards[piece] |= 1 << sq
+                self.occupancy[piece[0] == 'w'] |= 1 << sq
+                if piece == 'wK':
+                    self.whiteKingSq = sq
+                elif piece == 'bK':
+                    self.blackKingSq = sq
+        self.mgScore, self.egScore, self.phase = score_board(board)
+        self._board = None
+
+    # --- Views matching GameState's attributes -------------------------------
+
+    @property
+    def board(self):
+        """8x8 list of piece strings, rebuilt only after the position changed"""
+        if self._board is None:
+            squares = self.squares
+            self._board = [squares[r * 8:r * 8 + 8] for r in range(8)]
+        return self._board
+
+    @property
+    def whiteKingLocation(self):
+        return SQUARES[self.whiteKingSq]
+
+    @property
+    def blackKingLocation(self):
+        return SQUARES[self.blackKingSq]
+
+    @property
+    def enpassantPossible(self):
+        return SQUARES[self.epSquare] if self.epSquare >= 0 else ()
+
+    @property
+    def currentCastlingRights(self):
+        return CastleRights.from_bits(self.castling)
+
+    # Bookkeeping that only relies on the attributes above
+    update_position_count = GameState.update_position_count
+    get_fen = GameState.get_fen
+    is_draw = GameState.is_draw
+    get_pgn = GameState.get_pgn
+    get_result = GameState.get_result
+    get_valid_moves = GameState.get_valid_moves
+    game_status = GameState.game_status
+    is_checkmate = GameState.is_checkmate
+    is_stalemate = GameState.is_stalemate
+
+    # --- Making and unmaking moves -------------------------------------------
+
+    def make_move(self, move):
+        """Takes a Move as parameter and executes it"""
+        bb = self.bitboards
+        squares = self.squares
+        occupancy = self.occupancy
+        start = move.startRow * 8 + move.startCol
+        end = move.endRow * 8 + move.endCol
+        piece = move.pieceMoved
+        captured = move.pieceCaptured
+        white = piece[0] == 'w'
+
+        self.history.append((self.castling, self.epSquare, self.halfmoveClock, self.hash,
+                             self.mgScore, self.egScore, self.phase))
+        h = self.hash ^ SIDE_KEY ^ CASTLE_KEYS[self.castling]
+        if self.epSquare >= 0:
+            h ^= EP_KEYS[self.epSquare & 7]
+
+        if move.isEnpassantMove:
+            capSq = move.startRow * 8 + move.endCol
+            bb[captured] ^= 1 << capSq
+            occupancy[not white] ^= 1 << capSq
+            squares[capSq] = "--"
+            h ^= PIECE_KEYS[captured][capSq]
+        elif captured != "--":
+            capSq = end
+            bb[captured] ^= 1 << end
+            occupancy[not white] ^= 1 << end
+            h ^= PIECE_KEYS[captured][end]
+
+        placed = piece[0] + move.promotionPiece if move.isPawnPromotion else piece
+        mg = self.mgScore - MG_SCORES[piece][start] + MG_SCORES[placed][end]
+        eg = self.egScore - EG_SCORES[piece][start] + EG_SCORES[placed][end]
+        phase = self.phase + PHASE[placed] - PHASE[piece]
+        if captured != "--":
+            mg -= MG_SCORES[captured][capSq]
+            eg -= EG_SCORES[captured][capSq]
+            phase -= PHASE[captured]
+        bb[piece] ^= 1 << start
+        bb[placed] |= 1 << end
+        occupancy[white] ^= (1 << start) | (1 << end)
+        squares[start] = "--"
+        squares[end] = placed
+        h ^= PIECE_KEYS[piece][start] ^ PIECE_KEYS[placed][end]
+
+        if move.isCastleMove:
+            if end > start:  # Kingside castle
+                rookFrom, rookTo = end + 1, end - 1
+            else:  # Queenside castle
+                rookFrom, rookTo = end - 2, end + 1
+            rook = squares[rookFrom]
+            bb[rook] ^= (1 << rookFrom) | (1 << rookTo)
+            occupancy[white] ^= (1 << rookFrom) | (1 << rookTo)
+            squares[rookFrom] = "--"
+            squares[rookTo] = rook
+            h ^= PIECE_KEYS[rook][rookFrom] ^ PIECE_KEYS[rook][rookTo]
+            mg += MG_SCORES[rook][rookTo] - MG_SCORES[rook][rookFrom]
+            eg += EG_SCORES[rook][rookTo] - EG_SCORES[rook][rookFrom]
+        self.mgScore, self.egScore, self.phase = mg, eg, phase
+
+        if piece[1] == 'K':
+            if white:
+                self.whiteKingSq = end
+            else:
+                self.blackKingSq = end
+
+        if piece[1] == 'p' and (end - start == 16 or start - end == 16):
+            self.epSquare = (start + end) // 2
+            h ^= EP_KEYS[self.epSquare & 7]
+        else:
+            self.epSquare = -1
+
+        self.castling &= CASTLE_MASK[start] & CASTLE_MASK[end]
+        h ^= CASTLE_KEYS[self.castling]
+
+        if piece[1] == 'p' or captured != "--":
+            self.halfmoveClock = 0
+        else:
+            self.halfmoveClock += 1
+
+        self.hash = h
+        self.whiteToMove = not white
+        self.moveLog.append(move)
+        self._board = None
+        self.update_position_count()
+
+    def undo_move(self):
+        """Undo the last move made"""
+        if not self.moveLog:
+            return
+        self.positionCounts[self.hash] -= 1
+        move = self.moveLog.pop()
+        (self.castling, self.epSquare, self.halfmoveClock, self.hash,
+         self.mgScore, self.egScore, self.phase) = self.history.pop()
+
+        bb = self.bitboards
+        squares = self.squares
+        occupancy = self.occupancy
+        start = move.startRow * 8 + move.startCol
+        end = move.endRow * 8 + move.endCol
+        piece = move.pieceMoved
+        captured = move.pieceCaptured
+        white = piece[0] == 'w'
+
+        placed = squares[end]
+        bb[placed] ^= 1 << end
+        bb[piece] |= 1 << start
+        occupancy[white] ^= (1 << start) | (1 << end)
+        squares[start] = piece
+        squares[end] = "--"
+
+        if move.isEnpassantMove:
+            capSq = move.startRow * 8 + move.endCol
+            bb[captured] |= 1 << capSq
+            occupancy[not white] |= 1 << capSq
+            squares[capSq] = captured
+        elif captured != "--":
+            bb[captured] |= 1 << end
+            occupancy[not white] |= 1 << end
+            squares[end] = captured
+
+        if move.isCastleMove:
+            if end > start:
+                rookFrom, rookTo = end + 1, end - 1
+            else:
+                rookFrom, rookTo = end - 2, end + 1
+            rook = squares[rookTo]
+            bb[rook] ^= (1 << rookFrom) | (1 << rookTo)
+            occupancy[white] ^= (1 << rookFrom) | (1 << rookTo)
+            squares[rookTo] = "--"
+            squares[rookFrom] = rook
+
+        if piece[1] == 'K':
+            if white:
+                self.whiteKingSq = start
+            else:
+                self.blackKingSq = start
+
+        self.whiteToMove = white
+        self._board = None
+
+    def make_null_move(self):
+        """Pass the turn without moving a piece (see GameState.make_null_move)"""
+        self.history.append((self.castling, self.epSquare, self.halfmoveClock, self.hash,
+                             self.mgScore, self.egScore, self.phase))
+        h = self.hash ^ SIDE_KEY
+        if self.epSquare >= 0:
+            h ^= EP_KEYS[self.epSquare & 7]
+        self.hash = h
+        self.epSquare = -1
+        self.halfmoveClock += 1
+        self.whiteToMove = not self.whiteToMove
+        self.moveLog.append(None)
+
+    def undo_null_move(self):
+        """Take back make_null_move"""
+        self.moveLog.pop()
+        (self.castling, self.epSquare, self.halfmoveClock, self.hash,
+         self.mgScore, self.egScore, self.phase) = self.history.pop()
+        self.whiteToMove = not self.whiteToMove
+
+    # --- Attack queries -------------------------------------------------------
+
+    def attack_map(self, white, occ):
+        """Every square attacked by the given side with occupancy occ"""
+        bb = self.bitboards
+        names = PIECE_NAMES[white]
+        pawns = bb[names[0]]
+        if white:
+            attacks = ((pawns & NOT_FILE_A) >> 9) | ((pawns & NOT_FILE_H) >> 7)
+        else:
+            attacks = (((pawns & NOT_FILE_A) << 7) | ((pawns & NOT_FILE_H) << 9)) & FULL
+        knights = bb[names[1]]
+        while knights:
+            low = knights & -knights
+            attacks |= KNIGHT_ATTACKS[low.bit_length() - 1]
+            knights ^= low
+        queens = bb[names[4]]
+        diagonal = bb[names[2]] | queens
+        while diagonal:
+            low = diagonal & -diagonal
+            attacks |= bishop_attacks(low.bit_length() - 1, occ)
+            diagonal ^= low
+        straight = bb[names[3]] | queens
+        while straight:
+            low = straight & -straight
+            attacks |= rook_attacks(low.bit_length() - 1, occ)
+            straight ^= low
+        return attacks | KING_ATTACKS[(bb[names[5]]).bit_length() - 1]
+
+    def attackers_to(self, sq, white, occ):
+        """Pieces of the given side attacking sq"""
+        bb = self.bitboards
+        names = PIECE_NAMES[white]
+        queens = bb[names[4]]
+        return ((PAWN_ATTACKS[not white][sq] & bb[names[0]]) |
+                (KNIGHT_ATTACKS[sq] & bb[names[1]]) |
+                (bishop_attacks(sq, occ) & (bb[names[2]] | queens)) |
+                (rook_attacks(sq, occ) & (bb[names[3]] | queens)) |
+                (KING_ATTACKS[sq] & bb[names[5]]))
+
+    def attacked_by(self, color, square):
+        """True if a piece of color ('w' or 'b') attacks square (row, col)"""
+        occ = self.occupancy[0] | self.occupancy[1]
+        return self.attackers_to(square[0] * 8 + square[1], color == 'w', occ) != 0
+
+    def in_check(self):
+        """True if the side to move is in check, without generating moves"""
+        occ = self.occupancy[0] | self.occupancy[1]
+        king = self.whiteKingSq if self.whiteToMove else self.blackKingSq
+        return self.attackers_to(king, not self.whiteToMove, occ) != 0
+
+    def has_non_pawn_material(self):
+        """True if the side to move has a knight, bishop, rook or queen"""
+        bb = self.bitboards
+        color = 'w' if self.whiteToMove else 'b'
+        return (bb[color + 'N'] | bb[color + 'B'] | bb[color + 'R'] | bb[color + 'Q']) != 0
+
+    def attackers_of(self, square):
+        """(row, col) of every piece, of either colour, attacking square (row, col)"""
+        sq = square[0] * 8 + square[1]
+        occ = self.occupancy[0] | self.occupancy[1]
+        bits = self.attackers_to(sq, True, occ) | self.attackers_to(sq, False, occ)
+        attackers = []
+        while bits:
+            low = bits & -bits
+            attackers.append(SQUARES[low.bit_length() - 1])
+            bits ^= low
+        return attackers
+
+    def square_under_attack(self, r, c):
+        """Determine if the enemy can attack the square r, c"""
+        occ = self.occupancy[0] | self.occupancy[1]
+        return self.attackers_to(r * 8 + c, not self.whiteToMove, occ) != 0
+
+    # --- Move generation ------------------------------------------------------
+
+    def generate_legal_moves(self):
+        """All legal moves. Only refreshes inCheck: no game-over flags, no draw checks, no output"""
+        return self._legal_moves()
+
+    def has_legal_move(self):
+        """True if the side to move has any legal move (the move list is built in one pass here)"""
+        return bool(self._legal_moves())
+
+    def get_capture_moves(self):
+        """Legal captures and promotions only"""
+        return self._legal_moves(captures=True)
+
+    def get_quiet_moves(self):
+        """Legal moves that neither capture nor promote (castling included)"""
+        return self._legal_moves(captures=False)
+
+    def _legal_moves(self, captures=None):
+        """Legal moves; captures=True keeps only captures and promotions, False only the rest"""
+        white = self.whiteToMove
+        bb = self.bitboards
+        squares = self.squares
+        own = self.occupancy[white]
+        enemy = self.occupancy[not white]
+        occ = own | enemy
+        names = PIECE_NAMES[white]
+        enemyNames = PIECE_NAMES[not white]
+        ksq = self.whiteKingSq if white else self.blackKingSq
+        king = names[5]
+        moves = []
+        new_move = Move.from_pieces
+
+        enemyDiagonal = bb[enemyNames[2]] | bb[enemyNames[4]]
+        enemyStraight = bb[enemyNames[3]] | bb[enemyNames[4]]
+        checkers = ((PAWN_ATTACKS[white][ksq] & bb[enemyNames[0]]) |
+                    (KNIGHT_ATTACKS[ksq] & bb[enemyNames[1]]) |
+                    (bishop_attacks(ksq, occ) & enemyDiagonal) |
+                    (rook_attacks(ksq, occ) & enemyStraight))
+        self.inCheck = checkers != 0
+
+        # King steps: the enemy attack map is built without our king so that
+        # it cannot step back along the checking ray.
+        danger = self.attack_map(not white, occ ^ (1 << ksq))
+        if captures is None:
+            stageMask = FULL
+        elif captures:
+            stageMask = enemy
+        else:
+            stageMask = FULL ^ enemy
+        targets = KING_ATTACKS[ksq] & ~own & ~danger & stageMask
+        kingFrom = SQUARES[ksq]
+        while targets:
+            low = targets & -targets
+            to = low.bit_length() - 1
+            targets ^= low
+            moves.append(new_move(kingFrom, SQUARES[to], king, squares[to]))
+
+        if checkers & (checkers - 1):  # Double check: only the king can move
+            return moves
+
+        if checkers:
+            checkMask = checkers | BETWEEN[ksq][checkers.bit_length() - 1]
+        else:
+            checkMask = FULL
+
+        pinned = 0
+        snipers = (ROOK_EMPTY[ksq] & enemyStraight) | (BISHOP_EMPTY[ksq] & enemyDiagonal)
+        while snipers:
+            low = snipers & -snipers
+            snipers ^= low
+            blockers = BETWEEN[ksq][low.bit_length() - 1] & occ
+            if blockers and not blockers & (blockers - 1) and blockers & own:
+                pinned |= blockers
+
+        allowed = ~own & checkMask & stageMask
+
+        # Pawns, generated set-wise
+        pawn = names[0]
+        pawns = bb[pawn]
+        empty = ~occ & FULL
+        if white:
+            single = (pawns >> 8) & empty
+            double = ((single & ROW_3) >> 8) & empty
+            left = ((pawns & NOT_FILE_A) >> 9) & enemy
+            right = ((pawns & NOT_FILE_H) >> 7) & enemy
+            offsets = (8, 16, 9, 7)
+        else:
+            single = (pawns << 8) & empty
+            double = ((single & ROW_6) << 8) & empty
+            left = ((pawns & NOT_FILE_A) << 7) & enemy
+            right = ((pawns & NOT_FILE_H) << 9) & enemy
+            offsets = (-8, -16, -7, -9)
+        if captures:
+            single &= PROMOTION_ROWS
+            double = 0
+        elif captures is not None:
+            single &= ~PROMOTION_ROWS
+            left = right = 0
+        for targets, offset in zip((single & checkMask, double & checkMask, left & checkMask, right & checkMask), offsets):
+            while targets:
+                low = targets & -targets
+                to = low.bit_length() - 1
+                targets ^= low
+                frm = to + offset
+                if pinned >> frm & 1 and not LINE[ksq][frm] & low:
+                    continue
+                if low & PROMOTION_ROWS:
+                    for promotion in PROMOTION_PIECES:
+                        moves.append(new_move(SQUARES[frm], SQUARES[to], pawn, squares[to], promotionPiece=promotion))
+                else:
+                    moves.append(new_move(SQUARES[frm], SQUARES[to], pawn, squares[to]))
+
+        ep = self.epSquare
+        if ep >= 0 and captures is not False:
+            capSq = ep + 8 if white else ep - 8
+            if checkMask & ((1 << ep) | (1 << capSq)):
+                capturers = PAWN_ATTACKS[not white][ep] & pawns
+                while capturers:
+                    low = capturers & -capturers
+                    frm = low.bit_length() - 1
+                    capturers ^= low
+                    # Lift both pawns and check the king's lines directly; this
+                    # also covers the rank pin where both pawns shield the king.
+                    after = (occ ^ low ^ (1 << capSq)) | (1 << ep)
+                    if rook_attacks(ksq, after) & enemyStraight:
+                        continue
+                    if bishop_attacks(ksq, after) & enemyDiagonal:
+                        continue
+                    moves.append(new_move(SQUARES[frm], SQUARES[ep], pawn, squares[ep], isEnPassantMove=True))
+
+        # Knights (a pinned knight can never move)
+        knight = names[1]
+        pieces = bb[knight] & ~pinned
+        while pieces:
+            low = pieces & -pieces
+            frm = low.bit_length() - 1
+            pieces ^= low
+            targets = KNIGHT_ATTACKS[frm] & allowed
+            start = SQUARES[frm]
+            while targets:
+                lowTo = targets & -targets
+                to = lowTo.bit_length() - 1
+                targets ^= lowTo
+                moves.append(new_move(start, SQUARES[to], knight, squares[to]))
+
+        # Sliders
+        for piece, attacks in ((names[2], bishop_attacks), (names[3], rook_attacks), (names[4], None)):
+            pieces = bb[piece]
+            while pieces:
+                low = pieces & -pieces
+                frm = low.bit_length() - 1
+                pieces ^= low
+                if attacks is None:
+                    targets = (rook_attacks(frm, occ) | bishop_attacks(frm, occ)) & allowed
+                else:
+                    targets = attacks(frm, occ) & allowed
+                if pinned & low:
+                    targets &= LINE[ksq][frm]
+                start = SQUARES[frm]
+                while targets:
+                    lowTo = targets & -targets
+                    to = lowTo.bit_length() - 1
+                    targets ^= lowTo
+                    moves.append(new_move(start, SQUARES[to], piece, squares[to]))
+
+        # Castling
+        if not checkers and not captures:
+            if white:
+                if self.castling & WKS and not occ & WKS_EMPTY and not danger & WKS_SAFE:
+                    moves.append(new_move(kingFrom, (7, 6), king, "--", isCastleMove=True))
+                if self.castling & WQS and not occ & WQS_EMPTY and not danger & WQS_SAFE:
+                    moves.append(new_move(kingFrom, (7, 2), king, "--", isCastleMove=True))
+            else:
+                if self.castling & BKS and not occ & BKS_EMPTY and not danger & BKS_SAFE:
+                    moves.append(new_move(kingFrom, (0, 6), king, "--", isCastleMove=True))
+                if self.castling & BQS and not occ & BQS_EMPTY and not danger & BQS_SAFE:
+                    moves.append(new_move(kingFrom, (0, 2), king, "--", isCastleMove=True))
+
+        return moves
@@ -1,5 +1,17 @@
 """Castling rights value object."""
 
+# Castling bits, same packing as zobrist.castle_bits
+WKS, WQS, BKS, BQS = 1, 2, 4, 8
+
+# Castling bits that survive a move touching each square (row * 8 + col)
+CASTLE_MASK = [WKS | WQS | BKS | BQS] * 64
+CASTLE_MASK[56] = WKS | BKS | BQS   # a1
+CASTLE_MASK[63] = WQS | BKS | BQS   # h1
+CASTLE_MASK[60] = BKS | BQS         # e1
+CASTLE_MASK[0] = WKS | WQS | BKS    # a8
+CASTLE_MASK[7] = WKS | WQS | BQS    # h8
+CASTLE_MASK[4] = WKS | WQS          # e8
+
 
 class CastleRights:
     def __init__(self, wks, bks, wqs, bqs):
@@ -8,4 +20,7 @@ class CastleRights:
         self.wqs = wqs  # White queen side
         self.bqs = bqs  # Black queen side
 
-
+    @classmethod
+    def from_bits(cls, bits):
+        """Unpack castling bits (WKS | WQS | BKS | BQS)"""
+        return cls(bool(bits & WKS), bool(bits & BKS), bool(bits & WQS), bool(bits & BQS))
@@ -0,0 +1,37 @@
+"""FEN parsing shared by the game state backends."""
+
+from .castling import CastleRights
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+def parse_fen(fen):
+    """Split a FEN string into (board, whiteToMove, CastleRights, enpassant, halfmoveClock)"""
+    fields = fen.split()
+    placement, turn = fields[0], fields[1]
+    castling = fields[2] if len(fields) > 2 else "-"
+    enpassant = fields[3] if len(fields) > 3 else "-"
+    halfmoveClock = int(fields[4]) if len(fields) > 4 else 0
+
+    board = []
+    for rank in placement.split("/"):
+        row = []
+        for ch in rank:
+            if ch.isdigit():
+                row.extend(["--"] * int(ch))
+            else:
+                color = 'w' if ch.isupper() else 'b'
+                row.append(color + ('p' if ch in "pP" else ch.upper()))
+        if len(row) != 8:
+            raise ValueError(f"Bad FEN rank {rank!r} in {fen!r}")
+        board.append(row)
+    if len(board) != 8:
+        raise ValueError(f"Bad FEN placement in {fen!r}")
+
+    rights = CastleRights('K' in castling, 'k' in castling, 'Q' in castling, 'q' in castling)
+    if enpassant == "-":
+        enpassantSquare = ()
+    else:
+        enpassantSquare = (8 - int(enpassant[1]), "abcdefgh".index(enpassant[0]))
+
+    return board, turn == 'w', rights, enpassantSquare, halfmoveClock
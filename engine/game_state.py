@@ -3,8 +3,23 @@ GameState: stores the state of a chess game and computes legal moves.
 Code moved verbatim from the monolithic ChessEngine.py for modularity.
 """
 
-from .castling import CastleRights
-from .move import Move
+import copy
+
+from .castling import CastleRights, WKS, WQS, BKS, BQS, CASTLE_MASK
+from .fen import parse_fen
+from .move import Move, PROMOTION_PIECES
+from .pst import MG_SCORES, EG_SCORES, PHASE, score_board
+from .snapshot import Snapshot, pack_squares, unpack_snapshot
+from .tables import DIRECTIONS, ROOK_DIRECTIONS, BISHOP_DIRECTIONS, KNIGHT_TARGETS, KING_TARGETS, RAYS, BETWEEN, \
+    DIRECTION_INDEX
+from .zobrist import PIECE_KEYS, SIDE_KEY, CASTLE_KEYS, EP_KEYS, castle_bits, compute_hash
+
+# Values returned by game_status()
+ONGOING = "ongoing"
+CHECKMATE = "checkmate"
+STALEMATE = "stalemate"
+FIFTY_MOVE_DRAW = "fifty-move"
+REPETITION_DRAW = "repetition"
 
 
 class GameState:
@@ -37,10 +52,7 @@ class GameState:
         self.checks = []
 
         self.enpassantPossible = ()
-        self.enpassantPossibleLog = [()]  # Track en passant history for undo
-
-        self.currentCastlingRights = CastleRights(True, True, True, True)
-        self.castleRightsLog = [CastleRights(self.currentCastlingRights.wks, self.currentCastlingRights.bks,self.currentCastlingRights.wqs, self.currentCastlingRights.bqs)]
+        self.castling = WKS | WQS | BKS | BQS  # see currentCastlingRights
 
         self.whiteToMove = True
         self.moveLog = []
@@ -50,10 +62,110 @@ class GameState:
         self.drawBy50Move = False
         self.drawByRepetition = False
 
+        # Zobrist key of the current position, maintained by make_move/undo_move
+        self.hash = compute_hash(self.board, self.whiteToMove, self.currentCastlingRights, self.enpassantPossible)
+
+        # Material + PST sums (middlegame, endgame) from White's side and the game phase,
+        # maintained by make_move/undo_move so evaluation does not rescan the board
+        self.mgScore, self.egScore, self.phase = score_board(self.board)
+
+        # Attack maps: attackMaps[color][sq] is a bitmask of the squares (bit row * 8 + col)
+        # holding pieces of that colour which attack sq; attackSets[sq] lists the squares
+        # attacked by the piece on sq. make_move refreshes only the pieces it disturbs.
+        self.attackMaps, self.attackSets = self._build_attack_maps()
+
+        # One (castling, enpassantPossible, halfmoveClock, hash, mgScore, egScore, phase,
+        # attackMaps, attackSets) record per ply, holding what undo_move cannot recompute
+        # from the Move itself
+        self.undoLog = []
+
         self.update_position_count()
 
+    @classmethod
+    def from_fen(cls, fen):
+        """Create a game state from a FEN string"""
+        return cls._from_position(*parse_fen(fen))
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Create a game state from a Snapshot (taken from any backend); the move history starts empty"""
+        return cls._from_position(*unpack_snapshot(snapshot))
+
+    @classmethod
+    def _from_position(cls, board, whiteToMove, rights, enpassant, halfmoveClock):
+        gs = cls()
+        gs.board = board
+        for r in range(8):
+            for c in range(8):
+                if board[r][c] == 'wK':
+                    gs.whiteKingLocation = (r, c)
+                elif board[r][c] == 'bK':
+                    gs.blackKingLocation = (r, c)
+        gs.whiteToMove = whiteToMove
+        gs.castling = castle_bits(rights)
+        gs.enpassantPossible = enpassant
+        gs.halfmoveClock = halfmoveClock
+        gs.hash = compute_hash(board, whiteToMove, rights, enpassant)
+        gs.mgScore, gs.egScore, gs.phase = score_board(board)
+        gs.attackMaps, gs.attackSets = gs._build_attack_maps()
+        gs.positionCounts = {}
+        gs.update_position_count()
+        return gs
+
+    def snapshot(self):
+        """Compact immutable copy of the current position (see engine.snapshot)"""
+        ep = self.enpassantPossible
+        return Snapshot(pack_squares([piece for row in self.board for piece in row]), self.whiteToMove,
+                        self.castling, ep[0] * 8 + ep[1] if ep else -1,
+                        self.halfmoveClock, self.hash)
+
+    def clone(self):
+        """Independent copy that can make and undo moves without touching this one.
+
+        Only the containers are copied; logged moves, undo records and the
+        attack maps (replaced, never modified, by make_move) are shared.
+        """
+        gs = copy.copy(self)
+        gs.board = [row[:] for row in self.board]
+        gs.move_functions = {kind: getattr(gs, fn.__name__) for kind, fn in self.move_functions.items()}
+        gs.pins = list(self.pins)
+        gs.checks = list(self.checks)
+        gs.moveLog = list(self.moveLog)
+        gs.undoLog = list(self.undoLog)
+        gs.positionCounts = dict(self.positionCounts)
+        return gs
+
     def make_move(self, move):
         """Takes a Move as parameter and executes it"""
+        self.undoLog.append((self.castling, self.enpassantPossible, self.halfmoveClock, self.hash,
+                             self.mgScore, self.egScore, self.phase, self.attackMaps, self.attackSets))
+        h = self.hash ^ SIDE_KEY ^ CASTLE_KEYS[self.castling]
+        if self.enpassantPossible:
+            h ^= EP_KEYS[self.enpassantPossible[1]]
+        h ^= PIECE_KEYS[move.pieceMoved][move.startRow * 8 + move.startCol]
+        if move.pieceCaptured != "--" and not move.isEnpassantMove:
+            h ^= PIECE_KEYS[move.pieceCaptured][move.endRow * 8 + move.endCol]
+
+        startSq = move.startRow * 8 + move.startCol
+        endSq = move.endRow * 8 + move.endCol
+        placed = move.pieceMoved[0] + move.promotionPiece if move.isPawnPromotion else move.pieceMoved
+        mg = self.mgScore - MG_SCORES[move.pieceMoved][startSq] + MG_SCORES[placed][endSq]
+        eg = self.egScore - EG_SCORES[move.pieceMoved][startSq] + EG_SCORES[placed][endSq]
+        phase = self.phase + PHASE[placed] - PHASE[move.pieceMoved]
+        if move.pieceCaptured != "--":
+            captureSq = move.startRow * 8 + move.endCol if move.isEnpassantMove else endSq
+            mg -= MG_SCORES[move.pieceCaptured][captureSq]
+            eg -= EG_SCORES[move.pieceCaptured][captureSq]
+            phase -= PHASE[move.pieceCaptured]
+
+        # Lift the attacks of every piece on or looking at a square this move changes
+        touched = [startSq, endSq]
+        if move.isEnpassantMove:
+            touched.append(captureSq)
+        if move.isCastleMove:
+            touched += (endSq + 1, endSq - 1) if move.endCol > move.startCol else (endSq - 2, endSq + 1)
+        disturbed = self._lift_attacks(touched)
+
         self.board[move.startRow][move.startCol] = "--"
         self.board[move.endRow][move.endCol] = move.pieceMoved
         self.moveLog.append(move)
@@ -69,19 +181,32 @@ class GameState:
         if move.isPawnPromotion:
             promotedPiece = move.pieceMoved[0] + move.promotionPiece
             self.board[move.endRow][move.endCol] = promotedPiece
+            h ^= PIECE_KEYS[promotedPiece][move.endRow * 8 + move.endCol]
+        else:
+            h ^= PIECE_KEYS[move.pieceMoved][move.endRow * 8 + move.endCol]
 
         # En Passant Move
         if move.isEnpassantMove:
             self.board[move.startRow][move.endCol] = '--'
+            h ^= PIECE_KEYS[move.pieceCaptured][move.startRow * 8 + move.endCol]
 
         # Castle Move
         if move.isCastleMove:
+            rook = move.pieceMoved[0] + 'R'
             if move.endCol - move.startCol == 2:  # Kingside castle
+                rookFrom, rookTo = endSq + 1, endSq - 1
                 self.board[move.endRow][move.endCol-1] = self.board[move.endRow][move.endCol+1]  # Move rook
                 self.board[move.endRow][move.endCol+1] = '--'  # Remove rook from original position
+                h ^= PIECE_KEYS[rook][move.endRow * 8 + move.endCol + 1] ^ PIECE_KEYS[rook][move.endRow * 8 + move.endCol - 1]
             else:  # Queenside castle
+                rookFrom, rookTo = endSq - 2, endSq + 1
                 self.board[move.endRow][move.endCol+1] = self.board[move.endRow][move.endCol-2]  # Move rook
                 self.board[move.endRow][move.endCol-2] = '--'  # Remove rook from original position
+                h ^= PIECE_KEYS[rook][move.endRow * 8 + move.endCol - 2] ^ PIECE_KEYS[rook][move.endRow * 8 + move.endCol + 1]
+            mg += MG_SCORES[rook][rookTo] - MG_SCORES[rook][rookFrom]
+            eg += EG_SCORES[rook][rookTo] - EG_SCORES[rook][rookFrom]
+        self.mgScore, self.egScore, self.phase = mg, eg, phase
+        self._place_attacks(disturbed)
 
         # Update en passant possibility
         if move.pieceMoved[1] == 'p' and abs(move.startRow - move.endRow) == 2:
@@ -89,11 +214,8 @@ class GameState:
         else:
             self.enpassantPossible = ()
 
-        self.enpassantPossibleLog.append(self.enpassantPossible)
-
         # Update castling rights - whenever a rook or king moves
         self.update_castle_rights(move)
-        self.castleRightsLog.append(CastleRights(self.currentCastlingRights.wks, self.currentCastlingRights.bks,self.currentCastlingRights.wqs, self.currentCastlingRights.bqs))
 
         # 50-move rule: reset on pawn move or capture
         if move.pieceMoved[1] == 'p' or move.pieceCaptured != '--':
@@ -101,11 +223,21 @@ class GameState:
         else:
             self.halfmoveClock += 1
 
+        h ^= CASTLE_KEYS[self.castling]
+        if self.enpassantPossible:
+            h ^= EP_KEYS[self.enpassantPossible[1]]
+        self.hash = h
+
         self.update_position_count()
 
     def undo_move(self):
         """Undo the last move made"""
         if len(self.moveLog) > 0:
+            # Forget the position being left before it is taken back
+            self.positionCounts[self.hash] -= 1
+            (self.castling, self.enpassantPossible, self.halfmoveClock, self.hash,
+             self.mgScore, self.egScore, self.phase, self.attackMaps, self.attackSets) = self.undoLog.pop()
+
             move = self.moveLog.pop()
             # Restore moved piece to its original square
             self.board[move.startRow][move.startCol] = move.pieceMoved
@@ -141,40 +273,35 @@ class GameState:
                     self.board[move.endRow][move.endCol-2] = self.board[move.endRow][move.endCol+1]
                     self.board[move.endRow][move.endCol+1] = '--'
 
-            # Restore previous en passant state
-            self.enpassantPossibleLog.pop()
-            if len(self.enpassantPossibleLog) > 0:
-                self.enpassantPossible = self.enpassantPossibleLog[-1]
-            else:
-                self.enpassantPossible = ()
-
-            # Undo the castling rights
-            self.castleRightsLog.pop()
-            if len(self.castleRightsLog) > 0:
-                self.currentCastlingRights = self.castleRightsLog[-1]
-            else:
-                self.currentCastlingRights = CastleRights(True, True, True, True)
+    def make_null_move(self):
+        """Pass the turn without moving a piece, for null-move pruning in the search.
+
+        Flips the side to move and clears en passant; a None is logged in
+        moveLog so the ply is accounted for. Take it back with undo_null_move.
+        """
+        self.undoLog.append((self.castling, self.enpassantPossible, self.halfmoveClock, self.hash,
+                             self.mgScore, self.egScore, self.phase, self.attackMaps, self.attackSets))
+        h = self.hash ^ SIDE_KEY
+        if self.enpassantPossible:
+            h ^= EP_KEYS[self.enpassantPossible[1]]
+        self.hash = h
+        self.enpassantPossible = ()
+        self.halfmoveClock += 1
+        self.whiteToMove = not self.whiteToMove
+        self.moveLog.append(None)
 
-        # Undo halfmove clock
-        if self.moveLog:
-            last_move = self.moveLog[-1]
-            if last_move.pieceMoved[1] == 'p' or last_move.pieceCaptured != '--':
-                self.halfmoveClock = 0
-            else:
-                self.halfmoveClock -= 1
-        else:
-            self.halfmoveClock = 0
-        # Undo position count
-        fen = self.get_fen()
-        if fen in self.positionCounts:
-            self.positionCounts[fen] -= 1
+    def undo_null_move(self):
+        """Take back make_null_move"""
+        self.moveLog.pop()
+        (self.castling, self.enpassantPossible, self.halfmoveClock, self.hash,
+         self.mgScore, self.egScore, self.phase, self.attackMaps, self.attackSets) = self.undoLog.pop()
+        self.whiteToMove = not self.whiteToMove
 
     def update_position_count(self):
-        fen = self.get_fen()
-        self.positionCounts[fen] = self.positionCounts.get(fen, 0) + 1
+        self.positionCounts[self.hash] = self.positionCounts.get(self.hash, 0) + 1
 
     def get_fen(self):
-        # Generate a FEN-like string for repetition detection
+        # Generate a FEN-like string of the position (repetition tracking keys on self.hash)
         board_str = '/'.join([''.join(row) for row in self.board])
         turn = 'w' if self.whiteToMove else 'b'
         castling = f"{int(self.currentCastlingRights.wks)}{int(self.currentCastlingRights.wqs)}{int(self.currentCastlingRights.bks)}{int(self.currentCastlingRights.bqs)}"
@@ -187,8 +314,7 @@ class GameState:
             self.drawBy50Move = True
             return True
         # Threefold repetition
-        fen = self.get_fen()
-        if self.positionCounts.get(fen, 0) >= 3:
+        if self.positionCounts.get(self.hash, 0) >= 3:
             self.drawByRepetition = True
             return True
         self.drawBy50Move = False
@@ -196,7 +322,48 @@ class GameState:
         return False
 
     def get_valid_moves(self):
-        """All moves considering checks"""
+        """All moves considering checks; also refreshes the game-over flags (see game_status)"""
+        moves = self.generate_legal_moves()
+        self.game_status(moves)
+        return moves
+
+    def generate_legal_moves(self):
+        """All legal moves. Only refreshes inCheck: no game-over flags, no draw checks, no output"""
+        return self._legal_moves()
+
+    def game_status(self, moves=None):
+        """ONGOING, CHECKMATE, STALEMATE, FIFTY_MOVE_DRAW or REPETITION_DRAW for the current position.
+
+        Meant for the UI or a server, not the search. Sets checkMate, staleMate,
+        drawBy50Move and drawByRepetition as a side effect. Pass the legal moves
+        if they were already generated for this position.
+        """
+        if moves is None:
+            moves = self.generate_legal_moves()
+        self.checkMate = not moves and self.inCheck
+        self.staleMate = not moves and not self.inCheck
+        self.is_draw()
+
+        if self.checkMate:
+            return CHECKMATE
+        if self.staleMate:
+            return STALEMATE
+        if self.drawBy50Move:
+            return FIFTY_MOVE_DRAW
+        if self.drawByRepetition:
+            return REPETITION_DRAW
+        return ONGOING
+
+    def get_capture_moves(self):
+        """Legal captures and promotions only"""
+        return self._legal_moves(captures=True)
+
+    def get_quiet_moves(self):
+        """Legal moves that neither capture nor promote (castling included)"""
+        return self._legal_moves(captures=False)
+
+    def _legal_moves(self, captures=None):
+        """Legal moves; captures=True keeps only captures and promotions, False only the rest"""
         moves = []
         self.inCheck, self.pins, self.checks = self.check_for_pins_and_checks()
 
@@ -209,86 +376,290 @@ class GameState:
 
         if self.inCheck:
             if len(self.checks) == 1:
-                moves = self.get_all_possible_moves()
-                check = self.checks[0]
-                checkRow = check[0]
-                checkCol = check[1]
-                pieceChecking = self.board[checkRow][checkCol]
-                validSquares = []
-
-                # If knight is checking, must capture the knight
-                if pieceChecking[1] == 'N':
-                    validSquares = [(checkRow, checkCol)]
-                else:
-
-                    for i in range(1, 8):
-                        validSquare = (kingRow + check[2] * i, kingCol + check[3] * i)
-                        validSquares.append(validSquare)
-                        if validSquare[0] == checkRow and validSquare[1] == checkCol:
-                            break
-
-                for i in range(len(moves) - 1, -1, -1):
-                    if moves[i].pieceMoved[1] != 'K':
-                        if not (moves[i].endRow, moves[i].endCol) in validSquares:
-                            moves.remove(moves[i])
+                self.get_evasion_moves(kingRow, kingCol, moves, captures)
             else:
-                self.get_king_moves(kingRow, kingCol, moves)
+                self.get_king_moves(kingRow, kingCol, moves, captures)
         else:
-            moves = self.get_all_possible_moves()
-            if self.whiteToMove:
-                self.get_castle_moves(self.whiteKingLocation[0], self.whiteKingLocation[1], moves)
-            else:
-                self.get_castle_moves(self.blackKingLocation[0], self.blackKingLocation[1], moves)
+            moves = self.get_all_possible_moves(captures)
+            if captures is not True:
+                if self.whiteToMove:
+                    self.get_castle_moves(self.whiteKingLocation[0], self.whiteKingLocation[1], moves)
+                else:
+                    self.get_castle_moves(self.blackKingLocation[0], self.blackKingLocation[1], moves)
 
-        if len(moves) == 0:
-            if self.inCheck:
-                self.checkMate = True
-            else:
-                self.staleMate = True
+        return moves
 
-            print('PGN of the game:')
-            print(self.get_pgn())
-        else:
-            self.checkMate = False
-            self.staleMate = False
+    def check_block_squares(self, kingRow, kingCol, check):
+        """Squares where a non-king move answers a single check: the checker's square and, for a slider, the line up to it"""
+        return BETWEEN[kingRow * 8 + kingCol][check[0] * 8 + check[1]] + ((check[0], check[1]),)
+
+    def get_evasion_moves(self, kingRow, kingCol, moves, captures=None):
+        """Moves out of a single check: king moves, captures of the checker and interpositions.
+
+        Only moves landing on check_block_squares are generated, and pinned
+        pieces are skipped outright: they can never answer a check.
+        """
+        self.get_king_moves(kingRow, kingCol, moves, captures)
+
+        check = self.checks[0]
+        checker = (check[0], check[1])
+        targets = self.check_block_squares(kingRow, kingCol, check)
+        pinned = [(pin[0], pin[1]) for pin in self.pins]
+        ally = 'w' if self.whiteToMove else 'b'
+        board = self.board
+
+        for r in range(8):
+            for c in range(8):
+                piece = board[r][c]
+                if piece[0] != ally or piece[1] == 'K' or (r, c) in pinned:
+                    continue
+                kind = piece[1]
+                if kind == 'p':
+                    pawnMoves = []
+                    self.get_pawn_moves(r, c, pawnMoves, captures)
+                    for move in pawnMoves:
+                        # En passant can also remove a checking pawn from beside the capturer
+                        if (move.endRow, move.endCol) in targets or \
+                                (move.isEnpassantMove and (move.startRow, move.endCol) == checker):
+                            moves.append(move)
+                    continue
+
+                sq = r * 8 + c
+                for target in targets:
+                    if captures is not None and captures != (target == checker):
+                        continue
+                    targetSq = target[0] * 8 + target[1]
+                    if kind == 'N':
+                        reaches = target in KNIGHT_TARGETS[sq]
+                    else:
+                        d = DIRECTION_INDEX[sq][targetSq]
+                        reaches = d >= 0 and (kind == 'Q' or (d < 4) == (kind == 'R')) and \
+                            all(board[row][col] == "--" for row, col in BETWEEN[sq][targetSq])
+                    if reaches:
+                        moves.append(Move((r, c), target, board))
+
+    def has_legal_move(self):
+        """True if the side to move has any legal move; stops at the first one found.
+
+        Tries the king first, then the other pieces nearest the king, which are
+        the likeliest to block or capture a checker. Castling is never needed:
+        if a castle is legal, so is the king's step towards the rook.
+        Refreshes inCheck like generate_legal_moves.
+        """
+        self.inCheck, self.pins, self.checks = self.check_for_pins_and_checks()
+        kingRow, kingCol = self.whiteKingLocation if self.whiteToMove else self.blackKingLocation
 
-        self.is_draw()
+        moves = []
+        self.get_king_moves(kingRow, kingCol, moves)
+        if moves:
+            return True
+        if len(self.checks) > 1:
+            return False
+        validSquares = self.check_block_squares(kingRow, kingCol, self.checks[0]) if self.inCheck else None
+
+        ally = 'w' if self.whiteToMove else 'b'
+        pieces = [(max(abs(r - kingRow), abs(c - kingCol)), r, c)
+                  for r in range(8) for c in range(8)
+                  if self.board[r][c][0] == ally and self.board[r][c][1] != 'K']
+        pieces.sort()
+        for _, r, c in pieces:
+            self.move_functions[self.board[r][c][1]](r, c, moves)
+            if validSquares is None:
+                if moves:
+                    return True
+                continue
+            for move in moves:
+                if (move.endRow, move.endCol) in validSquares or \
+                        (move.isEnpassantMove and (move.startRow, move.endCol) in validSquares):
+                    return True
+            moves.clear()
+        return False
 
-        return moves
+    def is_checkmate(self):
+        """Side to move is in check and has no legal move"""
+        return not self.has_legal_move() and self.inCheck
+
+    def is_stalemate(self):
+        """Side to move is not in check and has no legal move"""
+        return not self.has_legal_move() and not self.inCheck
 
     def get_castle_moves(self, r, c, moves):
         """Generate castle moves for the king at (r, c)"""
         if self.square_under_attack(r, c):
             return  # Can't castle if king is in check
 
-        if (self.whiteToMove and self.currentCastlingRights.wks) or (not self.whiteToMove and self.currentCastlingRights.bks):
+        if self.castling & (WKS if self.whiteToMove else BKS):
             self.get_kingside_castle_moves(r, c, moves)
-        if (self.whiteToMove and self.currentCastlingRights.wqs) or (not self.whiteToMove and self.currentCastlingRights.bqs):
+        if self.castling & (WQS if self.whiteToMove else BQS):
             self.get_queenside_castle_moves(r, c, moves)
 
     def get_kingside_castle_moves(self, r, c, moves):
         """Generate kingside castle moves"""
+        enemy = 'b' if self.whiteToMove else 'w'
         if self.board[r][c+1] == '--' and self.board[r][c+2] == '--':
-            if not self.square_under_attack(r, c+1) and not self.square_under_attack(r, c+2):
+            if not self.attacked_by(enemy, (r, c+1)) and not self.attacked_by(enemy, (r, c+2)):
                 moves.append(Move((r, c), (r, c+2), self.board, isCastleMove=True))
 
     def get_queenside_castle_moves(self, r, c, moves):
         """Generate queenside castle moves"""
+        enemy = 'b' if self.whiteToMove else 'w'
         if self.board[r][c-1] == '--' and self.board[r][c-2] == '--' and self.board[r][c-3] == '--':
-            if not self.square_under_attack(r, c-1) and not self.square_under_attack(r, c-2):
+            if not self.attacked_by(enemy, (r, c-1)) and not self.attacked_by(enemy, (r, c-2)):
                 moves.append(Move((r, c), (r, c-2), self.board, isCastleMove=True))
 
     def square_under_attack(self, r, c):
         """Determine if the enemy can attack the square r, c"""
-        self.whiteToMove = not self.whiteToMove
-        opp_moves = self.get_all_possible_moves()
-        self.whiteToMove = not self.whiteToMove
+        return self.attacked_by('b' if self.whiteToMove else 'w', (r, c))
+
+    def is_square_attacked(self, square, by_color):
+        """Determine if a piece of by_color attacks square, looking outward from it and stopping at the first hit"""
+        r, c = square
+        board = self.board
+        sq = r * 8 + c
+
+        # Pawns attack diagonally forward, so look one row behind the square
+        pawnRow = r + 1 if by_color == 'w' else r - 1
+        if 0 <= pawnRow < 8:
+            pawn = by_color + 'p'
+            if (c > 0 and board[pawnRow][c - 1] == pawn) or (c < 7 and board[pawnRow][c + 1] == pawn):
+                return True
 
-        for move in opp_moves:
-            if move.endRow == r and move.endCol == c:
+        knight = by_color + 'N'
+        for endRow, endCol in KNIGHT_TARGETS[sq]:
+            if board[endRow][endCol] == knight:
                 return True
+
+        king = by_color + 'K'
+        for endRow, endCol in KING_TARGETS[sq]:
+            if board[endRow][endCol] == king:
+                return True
+
+        # Sliding pieces: the first piece met along each ray decides
+        rays = RAYS[sq]
+        for slider, directions in (('R', ROOK_DIRECTIONS), ('B', BISHOP_DIRECTIONS)):
+            for d in directions:
+                for endRow, endCol in rays[d]:
+                    endPiece = board[endRow][endCol]
+                    if endPiece != "--":
+                        if endPiece[0] == by_color and (endPiece[1] == slider or endPiece[1] == 'Q'):
+                            return True
+                        break
         return False
 
+    def attacked_by(self, color, square):
+        """True if a piece of color ('w' or 'b') attacks square (row, col), read from the attack maps"""
+        return self.attackMaps[color][square[0] * 8 + square[1]] != 0
+
+    def in_check(self):
+        """True if the side to move is in check, read from the attack maps without generating moves"""
+        r, c = self.whiteKingLocation if self.whiteToMove else self.blackKingLocation
+        return self.attackMaps['b' if self.whiteToMove else 'w'][r * 8 + c] != 0
+
+    def has_non_pawn_material(self):
+        """True if the side to move has a knight, bishop, rook or queen"""
+        color = 'w' if self.whiteToMove else 'b'
+        return any(piece[0] == color and piece[1] in 'NBRQ' for row in self.board for piece in row)
+
+    def attackers_of(self, square):
+        """(row, col) of every piece, of either colour, attacking square (row, col)"""
+        sq = square[0] * 8 + square[1]
+        bits = self.attackMaps['w'][sq] | self.attackMaps['b'][sq]
+        attackers = []
+        while bits:
+            low = bits & -bits
+            attackers.append(divmod(low.bit_length() - 1, 8))
+            bits ^= low
+        return attackers
+
+    def _attacks_from(self, r, c, piece):
+        """Squares (row * 8 + col) attacked by piece standing on (r, c)"""
+        kind = piece[1]
+        if kind == 'p':
+            row = r - 1 if piece[0] == 'w' else r + 1
+            targets = []
+            if 0 <= row < 8:
+                if c > 0:
+                    targets.append(row * 8 + c - 1)
+                if c < 7:
+                    targets.append(row * 8 + c + 1)
+            return targets
+        if kind == 'N' or kind == 'K':
+            return [endRow * 8 + endCol for endRow, endCol in (KNIGHT_TARGETS if kind == 'N' else KING_TARGETS)[r * 8 + c]]
+
+        board = self.board
+        rays = RAYS[r * 8 + c]
+        targets = []
+        for d in (ROOK_DIRECTIONS if kind == 'R' else BISHOP_DIRECTIONS if kind == 'B' else range(8)):
+            for endRow, endCol in rays[d]:
+                targets.append(endRow * 8 + endCol)
+                if board[endRow][endCol] != "--":
+                    break
+        return targets
+
+    def _build_attack_maps(self):
+        """Attack maps for the current board, built from scratch"""
+        attackMaps = {'w': [0] * 64, 'b': [0] * 64}
+        attackSets = [()] * 64
+        for r in range(8):
+            for c in range(8):
+                piece = self.board[r][c]
+                if piece != "--":
+                    targets = self._attacks_from(r, c, piece)
+                    attackSets[r * 8 + c] = targets
+                    bit = 1 << (r * 8 + c)
+                    attackMap = attackMaps[piece[0]]
+                    for sq in targets:
+                        attackMap[sq] |= bit
+        return attackMaps, attackSets
+
+    def _lift_attacks(self, touched):
+        """Before the board changes: switch to fresh copies of the maps and remove the attacks of
+        every piece standing on or attacking a touched square. Returns those squares as a bitmask.
+
+        Only such pieces can gain or lose attacks: a slider's ray changes only past the first
+        changed square on it, which it already attacks.
+        """
+        whiteMap = self.attackMaps['w'][:]
+        blackMap = self.attackMaps['b'][:]
+        attackSets = self.attackSets[:]
+        self.attackMaps = {'w': whiteMap, 'b': blackMap}
+        self.attackSets = attackSets
+
+        disturbed = 0
+        for sq in touched:
+            disturbed |= whiteMap[sq] | blackMap[sq] | (1 << sq)
+        bits = disturbed
+        while bits:
+            low = bits & -bits
+            bits ^= low
+            src = low.bit_length() - 1
+            targets = attackSets[src]
+            if targets:
+                attackMap = whiteMap if self.board[src >> 3][src & 7][0] == 'w' else blackMap
+                keep = ~low
+                for sq in targets:
+                    attackMap[sq] &= keep
+                attackSets[src] = ()
+        return disturbed
+
+    def _place_attacks(self, disturbed):
+        """After the board changed: add back the attacks of whatever now stands on the disturbed squares"""
+        attackMaps = self.attackMaps
+        attackSets = self.attackSets
+        board = self.board
+        bits = disturbed
+        while bits:
+            low = bits & -bits
+            bits ^= low
+            src = low.bit_length() - 1
+            piece = board[src >> 3][src & 7]
+            if piece != "--":
+                targets = self._attacks_from(src >> 3, src & 7, piece)
+                attackSets[src] = targets
+                attackMap = attackMaps[piece[0]]
+                for sq in targets:
+                    attackMap[sq] |= low
+
     def check_for_pins_and_checks(self):
         pins = []
         checks = []
@@ -304,62 +675,51 @@ class GameState:
             allyColor = "b"
             startRow = self.blackKingLocation[0]
             startCol = self.blackKingLocation[1]
-
-        directions = [(-1, 0), (0, -1), (1, 0), (0, 1),
-                      (-1, -1), (-1, 1), (1, -1), (1, 1)]
+        sq = startRow * 8 + startCol
 
         # Check sliding pieces and pins
-        for j, d in enumerate(directions):
+        for j, ray in enumerate(RAYS[sq]):
+            d = DIRECTIONS[j]
             possiblePin = ()
-            for i in range(1, 8):
-                endRow = startRow + d[0] * i
-                endCol = startCol + d[1] * i
-                if 0 <= endRow < 8 and 0 <= endCol < 8:
-                    endPiece = self.board[endRow][endCol]
-                    if endPiece == "--":
-                        continue
-                    if endPiece[0] == allyColor and endPiece[1] != 'K':
+            for i, (endRow, endCol) in enumerate(ray, 1):
+                endPiece = self.board[endRow][endCol]
+                if endPiece == "--":
+                    continue
+                if endPiece[0] == allyColor and endPiece[1] != 'K':
+                    if possiblePin == ():
+                        possiblePin = (endRow, endCol, d[0], d[1])
+                    else:
+                        break
+                else:  # enemy piece
+                    pieceType = endPiece[1]
+                    if (0 <= j <= 3 and pieceType == 'R') or \
+                            (4 <= j <= 7 and pieceType == 'B') or \
+                            (pieceType == 'Q') or \
+                            (i == 1 and pieceType == 'K') or \
+                            (i == 1 and pieceType == 'p' and
+                             ((enemyColor == 'w' and 6 <= j <= 7) or
+                              (enemyColor == 'b' and 4 <= j <= 5))):
                         if possiblePin == ():
-                            possiblePin = (endRow, endCol, d[0], d[1])
-                        else:
+                            inCheck = True
+                            checks.append((endRow, endCol, d[0], d[1]))
                             break
-                    else:  # enemy piece
-                        pieceType = endPiece[1]
-                        if (0 <= j <= 3 and pieceType == 'R') or \
-                                (4 <= j <= 7 and pieceType == 'B') or \
-                                (pieceType == 'Q') or \
-                                (i == 1 and pieceType == 'K') or \
-                                (i == 1 and pieceType == 'p' and
-                                 ((enemyColor == 'w' and 6 <= j <= 7) or
-                                  (enemyColor == 'b' and 4 <= j <= 5))):
-                            if possiblePin == ():
-                                inCheck = True
-                                checks.append((endRow, endCol, d[0], d[1]))
-                                break
-                            else:
-                                pins.append(possiblePin)
-                                break
                         else:
+                            pins.append(possiblePin)
                             break
-                else:
-                    break
+                    else:
+                        break
 
         # Check knight attacks
-        knight_moves = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                        (1, -2), (1, 2), (2, -1), (2, 1)]
-        for m in knight_moves:
-            endRow = startRow + m[0]
-            endCol = startCol + m[1]
-            if 0 <= endRow < 8 and 0 <= endCol < 8:
-                endPiece = self.board[endRow][endCol]
-                if endPiece[0] == enemyColor and endPiece[1] == 'N':
-                    inCheck = True
-                    checks.append((endRow, endCol, m[0], m[1]))
+        knight = enemyColor + 'N'
+        for endRow, endCol in KNIGHT_TARGETS[sq]:
+            if self.board[endRow][endCol] == knight:
+                inCheck = True
+                checks.append((endRow, endCol, endRow - startRow, endCol - startCol))
 
         return inCheck, pins, checks
 
-    def get_all_possible_moves(self):
-        """All moves without considering checks"""
+    def get_all_possible_moves(self, captures=None):
+        """All moves without considering checks (captures filters as in _legal_moves)"""
         moves = []
         for r in range(len(self.board)):
             for c in range(len(self.board[r])):
@@ -367,11 +727,11 @@ class GameState:
 
                 if (turn == 'w' and self.whiteToMove) or (turn == 'b' and not self.whiteToMove):
                     piece = self.board[r][c][1]
-                    self.move_functions[piece](r, c, moves)
+                    self.move_functions[piece](r, c, moves, captures)
 
         return moves
 
-    def get_pawn_moves(self, r, c, moves):
+    def get_pawn_moves(self, r, c, moves, captures=None):
         """Get all pawn moves from position (r, c)"""
         piecePinned = False
         pinDirection = ()
@@ -393,22 +753,25 @@ class GameState:
             enemyColor = "w"
             kingRow, kingCol = self.blackKingLocation
 
-        # Move forward one square
+        # Move forward one square (a push only counts as a capture-stage move when it promotes)
+        promotes = r + moveDirection == 0 or r + moveDirection == 7
         if 0 <= r + moveDirection < 8 and self.board[r + moveDirection][c] == "--":
-            if not piecePinned or pinDirection == (moveDirection, 0):
-                moves.append(Move((r, c), (r + moveDirection, c), self.board))
+            # A pawn pinned along its file may still push, towards the pinner or away from it
+            if not piecePinned or pinDirection in ((moveDirection, 0), (-moveDirection, 0)):
+                if captures is None or captures == promotes:
+                    self.add_pawn_move((r, c), (r + moveDirection, c), moves)
 
                 # Move forward two squares from starting position
-                if r == startRow and self.board[r + 2 * moveDirection][c] == "--":
+                if r == startRow and self.board[r + 2 * moveDirection][c] == "--" and captures is not True:
                     moves.append(Move((r, c), (r + 2 * moveDirection, c), self.board))
 
         # Capture diagonally
-        if 0 <= r + moveDirection < 8:
+        if 0 <= r + moveDirection < 8 and captures is not False:
             # Capture left
             if c - 1 >= 0:
                 if self.board[r + moveDirection][c - 1][0] == enemyColor:
                     if not piecePinned or pinDirection == (moveDirection, -1):
-                        moves.append(Move((r, c), (r + moveDirection, c - 1), self.board))
+                        self.add_pawn_move((r, c), (r + moveDirection, c - 1), moves)
                 # En passant left
                 elif (r + moveDirection, c - 1) == self.enpassantPossible:
                     if not piecePinned or pinDirection == (moveDirection, -1):
@@ -420,7 +783,7 @@ class GameState:
             if c + 1 < 8:
                 if self.board[r + moveDirection][c + 1][0] == enemyColor:
                     if not piecePinned or pinDirection == (moveDirection, 1):
-                        moves.append(Move((r, c), (r + moveDirection, c + 1), self.board))
+                        self.add_pawn_move((r, c), (r + moveDirection, c + 1), moves)
                 # En passant right
                 elif (r + moveDirection, c + 1) == self.enpassantPossible:
                     if not piecePinned or pinDirection == (moveDirection, 1):
@@ -429,8 +792,16 @@ class GameState:
                             moves.append(Move((r, c), (r + moveDirection, c + 1), self.board, isEnPassantMove=True))
 
 
+    def add_pawn_move(self, start, end, moves):
+        """Append a pawn move, one per promotion piece when it reaches the last rank"""
+        if end[0] == 0 or end[0] == 7:
+            for piece in PROMOTION_PIECES:
+                moves.append(Move(start, end, self.board, promotionPiece=piece))
+        else:
+            moves.append(Move(start, end, self.board))
+
     def enpassant_leaves_king_in_check(self, pawnRow, pawnCol, captureRow, captureCol):
-        """Check if en passant move would leave own king in check using check_for_pins_and_checks"""
+        """Check if en passant move would leave own king in check using is_square_attacked"""
         originalMovingPawn = self.board[pawnRow][pawnCol]
         originalCapturedPawn = self.board[pawnRow][captureCol]
         originalDestination = self.board[captureRow][captureCol]
@@ -439,7 +810,10 @@ class GameState:
         self.board[pawnRow][captureCol] = "--"
         self.board[captureRow][captureCol] = originalMovingPawn
 
-        inCheck, _, _ = self.check_for_pins_and_checks()
+        if self.whiteToMove:
+            inCheck = self.is_square_attacked(self.whiteKingLocation, 'b')
+        else:
+            inCheck = self.is_square_attacked(self.blackKingLocation, 'w')
 
         self.board[pawnRow][pawnCol] = originalMovingPawn
         self.board[pawnRow][captureCol] = originalCapturedPawn
@@ -447,7 +821,7 @@ class GameState:
 
         return inCheck
 
-    def get_rook_moves(self, r, c, moves):
+    def get_rook_moves(self, r, c, moves, captures=None):
         """Get all rook moves from position (r, c)"""
         piecePinned = False
         pinDirection = ()
@@ -459,51 +833,40 @@ class GameState:
                     self.pins.remove(self.pins[i])
                 break
 
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
         enemy_color = 'b' if self.whiteToMove else 'w'
+        rays = RAYS[r * 8 + c]
 
-        for dr, dc in directions:
-            for i in range(1, 8):
-                end_row = r + dr * i
-                end_col = c + dc * i
-
-                if 0 <= end_row < 8 and 0 <= end_col < 8:
-                    if not piecePinned or pinDirection == (dr, dc) or pinDirection == (-dr, -dc):
-                        end_piece = self.board[end_row][end_col]
-                        if end_piece == "--":
-                            moves.append(Move((r, c), (end_row, end_col), self.board))
-                        elif end_piece[0] == enemy_color:
-                            moves.append(Move((r, c), (end_row, end_col), self.board))
-                            break
-                        else:
-                            break
+        for d in ROOK_DIRECTIONS:
+            dr, dc = DIRECTIONS[d]
+            if piecePinned and pinDirection != (dr, dc) and pinDirection != (-dr, -dc):
+                continue
+            for end_row, end_col in rays[d]:
+                end_piece = self.board[end_row][end_col]
+                if end_piece == "--":
+                    if captures is not True:
+                        moves.append(Move((r, c), (end_row, end_col), self.board))
+                elif end_piece[0] == enemy_color:
+                    if captures is not False:
+                        moves.append(Move((r, c), (end_row, end_col), self.board))
+                    break
                 else:
                     break
 
-    def get_knight_moves(self, r, c, moves):
+    def get_knight_moves(self, r, c, moves, captures=None):
         """Get all knight moves from position (r, c)"""
-        piecePinned = False
         for i in range(len(self.pins) - 1, -1, -1):
             if self.pins[i][0] == r and self.pins[i][1] == c:
-                piecePinned = True
                 self.pins.remove(self.pins[i])
-                break
+                return  # A pinned knight can never move
 
-        knight_moves = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                       (1, -2), (1, 2), (2, -1), (2, 1)]
         ally_color = 'w' if self.whiteToMove else 'b'
 
-        for dr, dc in knight_moves:
-            end_row = r + dr
-            end_col = c + dc
+        for end_row, end_col in KNIGHT_TARGETS[r * 8 + c]:
+            end_piece = self.board[end_row][end_col]
+            if end_piece[0] != ally_color and (captures is None or captures == (end_piece != "--")):
+                moves.append(Move((r, c), (end_row, end_col), self.board))
 
-            if 0 <= end_row < 8 and 0 <= end_col < 8:
-                if not piecePinned:
-                    end_piece = self.board[end_row][end_col]
-                    if end_piece[0] != ally_color:
-                        moves.append(Move((r, c), (end_row, end_col), self.board))
-
-    def get_bishop_moves(self, r, c, moves):
+    def get_bishop_moves(self, r, c, moves, captures=None):
         """Get all bishop moves from position (r, c)"""
         piecePinned = False
         pinDirection = ()
@@ -515,106 +878,56 @@ class GameState:
                     self.pins.remove(self.pins[i])
                 break
 
-        directions = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
         enemy_color = 'b' if self.whiteToMove else 'w'
+        rays = RAYS[r * 8 + c]
 
-        for dr, dc in directions:
-            for i in range(1, 8):
-                end_row = r + dr * i
-                end_col = c + dc * i
-
-                if 0 <= end_row < 8 and 0 <= end_col < 8:
-                    if not piecePinned or pinDirection == (dr, dc) or pinDirection == (-dr, -dc):
-                        end_piece = self.board[end_row][end_col]
-                        if end_piece == "--":
-                            moves.append(Move((r, c), (end_row, end_col), self.board))
-                        elif end_piece[0] == enemy_color:
-                            moves.append(Move((r, c), (end_row, end_col), self.board))
-                            break
-                        else:
-                            break
+        for d in BISHOP_DIRECTIONS:
+            dr, dc = DIRECTIONS[d]
+            if piecePinned and pinDirection != (dr, dc) and pinDirection != (-dr, -dc):
+                continue
+            for end_row, end_col in rays[d]:
+                end_piece = self.board[end_row][end_col]
+                if end_piece == "--":
+                    if captures is not True:
+                        moves.append(Move((r, c), (end_row, end_col), self.board))
+                elif end_piece[0] == enemy_color:
+                    if captures is not False:
+                        moves.append(Move((r, c), (end_row, end_col), self.board))
+                    break
                 else:
                     break
 
-    def get_queen_moves(self, r, c, moves):
+    def get_queen_moves(self, r, c, moves, captures=None):
         """Get all queen moves from position (r, c)"""
-        self.get_rook_moves(r, c, moves)
-        self.get_bishop_moves(r, c, moves)
+        self.get_rook_moves(r, c, moves, captures)
+        self.get_bishop_moves(r, c, moves, captures)
 
-    def get_king_moves(self, r, c, moves):
+    def get_king_moves(self, r, c, moves, captures=None):
         """Get all king moves from position (r, c)"""
-        king_moves = [(-1, -1), (-1, 0), (-1, 1), (0, -1),
-                      (0, 1), (1, -1), (1, 0), (1, 1)]
         ally_color = 'w' if self.whiteToMove else 'b'
+        enemy_map = self.attackMaps['b' if self.whiteToMove else 'w']
 
-        for dr, dc in king_moves:
-            end_row = r + dr
-            end_col = c + dc
+        # A sliding checker keeps attacking the square behind the king along its line,
+        # which the maps cannot see because the king itself blocks the ray
+        shadowed = []
+        for check in self.checks:
+            if self.board[check[0]][check[1]][1] in 'RBQ':
+                shadowed.append((r - check[2]) * 8 + c - check[3])
 
-            if 0 <= end_row < 8 and 0 <= end_col < 8:
-                end_piece = self.board[end_row][end_col]
-                if end_piece[0] != ally_color:
-                    original_piece = self.board[end_row][end_col]
-                    original_king_piece = self.board[r][c]
-
-                    self.board[end_row][end_col] = original_king_piece
-                    self.board[r][c] = "--"
-
-                    if ally_color == 'w':
-                        original_king_pos = self.whiteKingLocation
-                        self.whiteKingLocation = (end_row, end_col)
-                    else:
-                        original_king_pos = self.blackKingLocation
-                        self.blackKingLocation = (end_row, end_col)
-
-                    inCheck, pins, checks = self.check_for_pins_and_checks()
-
-                    self.board[r][c] = original_king_piece
-                    self.board[end_row][end_col] = original_piece
-
-                    if ally_color == 'w':
-                        self.whiteKingLocation = original_king_pos
-                    else:
-                        self.blackKingLocation = original_king_pos
-
-                    if not inCheck:
-                        moves.append(Move((r, c), (end_row, end_col), self.board))
+        for sq in self.attackSets[r * 8 + c]:
+            end_piece = self.board[sq >> 3][sq & 7]
+            if end_piece[0] != ally_color and (captures is None or captures == (end_piece != "--")) \
+                    and not enemy_map[sq] and sq not in shadowed:
+                moves.append(Move((r, c), (sq >> 3, sq & 7), self.board))
 
     def update_castle_rights(self, move):
-        """Update the castle rights given the move"""
-        if move.pieceMoved == 'wK':
-            self.currentCastlingRights.wks = False
-            self.currentCastlingRights.wqs = False
-        elif move.pieceMoved == 'bK':
-            self.currentCastlingRights.bks = False
-            self.currentCastlingRights.bqs = False
-        elif move.pieceMoved == 'wR':
-            if move.startRow == 7:
-                if move.startCol == 0:
-                    self.currentCastlingRights.wqs = False
-                elif move.startCol == 7:
-                    self.currentCastlingRights.wks = False
-        elif move.pieceMoved == 'bR':
-            if move.startRow == 0:
-                if move.startCol == 0:
-                    self.currentCastlingRights.bqs = False
-                elif move.startCol == 7:
-                    self.currentCastlingRights.bks = False
-
-        # Also update castling rights if a rook is captured
-        if move.pieceCaptured == 'wR':
-            if move.endRow == 7:
-                if move.endCol == 0:
-                    self.currentCastlingRights.wqs = False
-                elif move.endCol == 7:
-                    self.currentCastlingRights.wks = False
-        elif move.pieceCaptured == 'bR':
-            if move.endRow == 0:
-                if move.endCol == 0:
-                    self.currentCastlingRights.bqs = False
-                elif move.endCol == 7:
-                    self.currentCastlingRights.bks = False
+        """Update the castle rights given the move: a king or rook leaving its home square, or a rook captured on it"""
+        self.castling &= CASTLE_MASK[move.startRow * 8 + move.startCol] & CASTLE_MASK[move.endRow * 8 + move.endCol]
 
+    @property
+    def currentCastlingRights(self):
+        """CastleRights view of the castling bits"""
+        return CastleRights.from_bits(self.castling)
 
     def get_pgn(self):
         """Return the PGN string for the current game"""
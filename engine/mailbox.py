@@ -0,0 +1,591 @@
+"""
+MailboxGameState: same public API as GameState, but the board is a single flat
+10x12 array of small integer piece codes surrounded by sentinel cells, so an
+off-board step is detected by one lookup instead of two range checks.
+
+Piece codes are colour | type. Move.pieceMoved / pieceCaptured and the board
+view exposed to the UI use the usual two-character strings, translated through
+PIECE_NAMES / PIECE_CODES.
+"""
+
+import copy
+
+from .castling import CastleRights, WKS, WQS, BKS, BQS
+from .fen import parse_fen
+from .game_state import GameState
+from .move import Move, PROMOTION_PIECES
+from .pst import MG_SCORES, EG_SCORES, PHASE, score_board
+from .snapshot import Snapshot, pack_squares, unpack_snapshot
+from .zobrist import PIECE_KEYS, SIDE_KEY, CASTLE_KEYS, EP_KEYS, castle_bits, compute_hash
+
+
+EMPTY = 0
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = 1, 2, 3, 4, 5, 6
+WHITE, BLACK = 8, 16
+OFFBOARD = 32  # has neither colour bit, so it stops every ray
+TYPE_MASK = 7
+
+PIECE_NAMES = {EMPTY: "--"}
+for _color, _prefix in ((WHITE, "w"), (BLACK, "b")):
+    for _kind, _letter in ((PAWN, "p"), (KNIGHT, "N"), (BISHOP, "B"), (ROOK, "R"), (QUEEN, "Q"), (KING, "K")):
+        PIECE_NAMES[_color | _kind] = _prefix + _letter
+PIECE_CODES = {name: code for code, name in PIECE_NAMES.items()}
+
+
+def to_index(r, c):
+    """(row, col) -> 10x12 mailbox index"""
+    return (r + 2) * 10 + c + 1
+
+
+SQUARES_120 = [to_index(r, c) for r in range(8) for c in range(8)]  # the 64 playable cells
+INDEX_TO_RC = {to_index(r, c): (r, c) for r in range(8) for c in range(8)}
+
+N, S, W, E = -10, 10, -1, 1
+NW, NE, SW, SE = -11, -9, 9, 11
+STRAIGHT = (N, S, W, E)
+DIAGONAL = (NW, NE, SW, SE)
+KNIGHT_STEPS = (-21, -19, -12, -8, 8, 12, 19, 21)
+KING_STEPS = STRAIGHT + DIAGONAL
+
+# ZOBRIST[code][index] for every piece code on every playable cell
+ZOBRIST = {code: {idx: PIECE_KEYS[name][SQUARES_120.index(idx)] for idx in SQUARES_120}
+           for code, name in PIECE_NAMES.items() if code != EMPTY}
+
+# MG[code][index] / EG[code][index]: material + PST from White's side, PHASE_OF[code]: phase weight
+MG = {code: {idx: MG_SCORES[name][SQUARES_120.index(idx)] for idx in SQUARES_120}
+      for code, name in PIECE_NAMES.items() if code != EMPTY}
+EG = {code: {idx: EG_SCORES[name][SQUARES_120.index(idx)] for idx in SQUARES_120}
+      for code, name in PIECE_NAMES.items() if code != EMPTY}
+PHASE_OF = {code: PHASE[name] for code, name in PIECE_NAMES.items()}
+
+# Castling bits cleared by a move touching each king or rook home cell
+A1, E1, H1 = to_index(7, 0), to_index(7, 4), to_index(7, 7)
+A8, E8, H8 = to_index(0, 0), to_index(0, 4), to_index(0, 7)
+CASTLE_MASK = {A1: ~WQS, E1: ~(WKS | WQS), H1: ~WKS, A8: ~BQS, E8: ~(BKS | BQS), H8: ~BKS}
+
+
+class MailboxGameState:
+    def __init__(self):
+        self.cells = [OFFBOARD] * 120
+        self.whiteKing = E1
+        self.blackKing = E8
+        self._load_board(GameState().board)
+
+        self.checkMate = False
+        self.staleMate = False
+        self.inCheck = False
+
+        self.whiteToMove = True
+        self.moveLog = []
+        self.castling = WKS | WQS | BKS | BQS
+        self.epSquare = 0  # mailbox index of the en passant target, 0 when none
+        self.halfmoveClock = 0
+        self.history = []  # (castling, epSquare, halfmoveClock, hash, mgScore, egScore, phase) per ply
+
+        self.positionCounts = {}
+        self.drawBy50Move = False
+        self.drawByRepetition = False
+
+        self.hash = compute_hash(self.board, self.whiteToMove, self.currentCastlingRights, self.enpassantPossible)
+        self.update_position_count()
+
+    @classmethod
+    def from_fen(cls, fen):
+        """Create a game state from a FEN string"""
+        return cls._from_position(*parse_fen(fen))
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Create a game state from a Snapshot (taken from any backend); the move history starts empty"""
+        return cls._from_position(*unpack_snapshot(snapshot))
+
+    @classmethod
+    def _from_position(cls, board, whiteToMove, rights, enpassant, halfmoveClock):
+        gs = cls()
+        gs._load_board(board)
+        gs.whiteToMove = whiteToMove
+        gs.castling = castle_bits(rights)
+        gs.epSquare = to_index(*enpassant) if enpassant else 0
+        gs.halfmoveClock = halfmoveClock
+        gs.hash = compute_hash(board, whiteToMove, rights, enpassant)
+        gs.positionCounts = {}
+        gs.update_position_count()
+        return gs
+
+    def snapshot(self):
+        """Compact immutable copy of the current position (see engine.snapshot)"""
+        ep = INDEX_TO_RC[self.epSquare] if self.epSquare else ()
+        return Snapshot(pack_squares([PIECE_NAMES[self.cells[idx]] for idx in SQUARES_120]), self.whiteToMove,
+                        self.castling, ep[0] * 8 + ep[1] if ep else -1, self.halfmoveClock, self.hash)
+
+    def clone(self):
+        """Independent copy that can make and undo moves without touching this one.
+
+        Only the containers are copied; logged moves and history tuples are
+        immutable and shared by both states.
+        """
+        gs = copy.copy(self)
+        gs.cells = list(self.cells)
+        gs.moveLog = list(self.moveLog)
+        gs.history = list(self.history)
+        gs.positionCounts = dict(self.positionCounts)
+        return gs
+
+    def _load_board(self, board):
+        for idx in SQUARES_120:
+            r, c = INDEX_TO_RC[idx]
+            code = PIECE_CODES[board[r][c]]
+            self.cells[idx] = code
+            if code == WHITE | KING:
+                self.whiteKing = idx
+            elif code == BLACK | KING:
+                self.blackKing = idx
+        self.mgScore, self.egScore, self.phase = score_board(board)
+        self._board = None
+
+    # --- Views matching GameState's attributes -------------------------------
+
+    @property
+    def board(self):
+        """8x8 list of piece strings, rebuilt only after the position changed"""
+        if self._board is None:
+            cells = self.cells
+            self._board = [[PIECE_NAMES[cells[(r + 2) * 10 + c + 1]] for c in range(8)] for r in range(8)]
+        return self._board
+
+    @property
+    def whiteKingLocation(self):
+        return INDEX_TO_RC[self.whiteKing]
+
+    @property
+    def blackKingLocation(self):
+        return INDEX_TO_RC[self.blackKing]
+
+    @property
+    def enpassantPossible(self):
+        return INDEX_TO_RC[self.epSquare] if self.epSquare else ()
+
+    @property
+    def currentCastlingRights(self):
+        return CastleRights.from_bits(self.castling)
+
+    # Bookkeeping that only relies on the attributes above
+    update_position_count = GameState.update_position_count
+    get_fen = GameState.get_fen
+    is_draw = GameState.is_draw
+    get_pgn = GameState.get_pgn
+    get_result = GameState.get_result
+    get_valid_moves = GameState.get_valid_moves
+    game_status = GameState.game_status
+    is_checkmate = GameState.is_checkmate
+    is_stalemate = GameState.is_stalemate
+
+    # --- Making and unmaking moves -------------------------------------------
+
+    def make_move(self, move):
+        """Takes a Move as parameter and executes it"""
+        cells = self.cells
+        start = (move.startRow + 2) * 10 + move.startCol + 1
+        end = (move.endRow + 2) * 10 + move.endCol + 1
+        piece = PIECE_CODES[move.pieceMoved]
+        color = piece & (WHITE | BLACK)
+
+        self.history.append((self.castling, self.epSquare, self.halfmoveClock, self.hash,
+                             self.mgScore, self.egScore, self.phase))
+        mg, eg, phase = self.mgScore, self.egScore, self.phase
+        h = self.hash ^ SIDE_KEY ^ CASTLE_KEYS[self.castling]
+        if self.epSquare:
+            h ^= EP_KEYS[self.epSquare % 10 - 1]
+
+        if move.isEnpassantMove:
+            capSq = start - start % 10 + end % 10
+            captured = cells[capSq]
+            h ^= ZOBRIST[captured][capSq]
+            mg -= MG[captured][capSq]
+            eg -= EG[captured][capSq]
+            cells[capSq] = EMPTY
+        elif cells[end] != EMPTY:
+            captured = cells[end]
+            h ^= ZOBRIST[captured][end]
+            mg -= MG[captured][end]
+            eg -= EG[captured][end]
+            phase -= PHASE_OF[captured]
+
+        placed = PIECE_CODES[move.pieceMoved[0] + move.promotionPiece] if move.isPawnPromotion else piece
+        cells[start] = EMPTY
+        cells[end] = placed
+        h ^= ZOBRIST[piece][start] ^ ZOBRIST[placed][end]
+        mg += MG[placed][end] - MG[piece][start]
+        eg += EG[placed][end] - EG[piece][start]
+        phase += PHASE_OF[placed] - PHASE_OF[piece]
+
+        if move.isCastleMove:
+            if end > start:  # Kingside castle
+                rookFrom, rookTo = end + 1, end - 1
+            else:  # Queenside castle
+                rookFrom, rookTo = end - 2, end + 1
+            rook = cells[rookFrom]
+            cells[rookTo] = rook
+            cells[rookFrom] = EMPTY
+            h ^= ZOBRIST[rook][rookFrom] ^ ZOBRIST[rook][rookTo]
+            mg += MG[rook][rookTo] - MG[rook][rookFrom]
+            eg += EG[rook][rookTo] - EG[rook][rookFrom]
+        self.mgScore, self.egScore, self.phase = mg, eg, phase
+
+        kind = piece & TYPE_MASK
+        if kind == KING:
+            if color == WHITE:
+                self.whiteKing = end
+            else:
+                self.blackKing = end
+
+        if kind == PAWN and (end - start == 20 or start - end == 20):
+            self.epSquare = (start + end) // 2
+            h ^= EP_KEYS[self.epSquare % 10 - 1]
+        else:
+            self.epSquare = 0
+
+        if start in CASTLE_MASK:
+            self.castling &= CASTLE_MASK[start]
+        if end in CASTLE_MASK:
+            self.castling &= CASTLE_MASK[end]
+        h ^= CASTLE_KEYS[self.castling]
+
+        if kind == PAWN or move.pieceCaptured != "--":
+            self.halfmoveClock = 0
+        else:
+            self.halfmoveClock += 1
+
+        self.hash = h
+        self.whiteToMove = color != WHITE
+        self.moveLog.append(move)
+        self._board = None
+        self.update_position_count()
+
+    def undo_move(self):
+        """Undo the last move made"""
+        if not self.moveLog:
+            return
+        self.positionCounts[self.hash] -= 1
+        move = self.moveLog.pop()
+        (self.castling, self.epSquare, self.halfmoveClock, self.hash,
+         self.mgScore, self.egScore, self.phase) = self.history.pop()
+
+        cells = self.cells
+        start = (move.startRow + 2) * 10 + move.startCol + 1
+        end = (move.endRow + 2) * 10 + move.endCol + 1
+        piece = PIECE_CODES[move.pieceMoved]
+
+        cells[start] = piece
+        if move.isEnpassantMove:
+            cells[end] = EMPTY
+            cells[start - start % 10 + end % 10] = PIECE_CODES[move.pieceCaptured]
+        else:
+            cells[end] = PIECE_CODES[move.pieceCaptured]
+
+        if move.isCastleMove:
+            if end > start:
+                rookFrom, rookTo = end + 1, end - 1
+            else:
+                rookFrom, rookTo = end - 2, end + 1
+            cells[rookFrom] = cells[rookTo]
+            cells[rookTo] = EMPTY
+
+        if piece == WHITE | KING:
+            self.whiteKing = start
+        elif piece == BLACK | KING:
+            self.blackKing = start
+
+        self.whiteToMove = piece & WHITE != 0
+        self._board = None
+
+    def make_null_move(self):
+        """Pass the turn without moving a piece (see GameState.make_null_move)"""
+        self.history.append((self.castling, self.epSquare, self.halfmoveClock, self.hash,
+                             self.mgScore, self.egScore, self.phase))
+        h = self.hash ^ SIDE_KEY
+        if self.epSquare:
+            h ^= EP_KEYS[self.epSquare % 10 - 1]
+        self.hash = h
+        self.epSquare = 0
+        self.halfmoveClock += 1
+        self.whiteToMove = not self.whiteToMove
+        self.moveLog.append(None)
+
+    def undo_null_move(self):
+        """Take back make_null_move"""
+        self.moveLog.pop()
+        (self.castling, self.epSquare, self.halfmoveClock, self.hash,
+         self.mgScore, self.egScore, self.phase) = self.history.pop()
+        self.whiteToMove = not self.whiteToMove
+
+    # --- Attack queries -------------------------------------------------------
+
+    def is_attacked(self, sq, by):
+        """True if a piece of colour `by` attacks mailbox index sq"""
+        cells = self.cells
+        if by == WHITE:
+            if cells[sq + 9] == WHITE | PAWN or cells[sq + 11] == WHITE | PAWN:
+                return True
+        elif cells[sq - 9] == BLACK | PAWN or cells[sq - 11] == BLACK | PAWN:
+            return True
+        knight = by | KNIGHT
+        for step in KNIGHT_STEPS:
+            if cells[sq + step] == knight:
+                return True
+        king = by | KING
+        for step in KING_STEPS:
+            if cells[sq + step] == king:
+                return True
+        queen = by | QUEEN
+        for sliders, steps in ((by | ROOK, STRAIGHT), (by | BISHOP, DIAGONAL)):
+            for step in steps:
+                t = sq + step
+                code = cells[t]
+                while code == EMPTY:
+                    t += step
+                    code = cells[t]
+                if code == sliders or code == queen:
+                    return True
+        return False
+
+    def attacked_by(self, color, square):
+        """True if a piece of color ('w' or 'b') attacks square (row, col)"""
+        return self.is_attacked(to_index(*square), WHITE if color == 'w' else BLACK)
+
+    def in_check(self):
+        """True if the side to move is in check, without generating moves"""
+        if self.whiteToMove:
+            return self.is_attacked(self.whiteKing, BLACK)
+        return self.is_attacked(self.blackKing, WHITE)
+
+    def has_non_pawn_material(self):
+        """True if the side to move has a knight, bishop, rook or queen"""
+        color = WHITE if self.whiteToMove else BLACK
+        return any(cell & color and KNIGHT <= cell & TYPE_MASK <= QUEEN for cell in self.cells)
+
+    def attackers_of(self, square):
+        """(row, col) of every piece, of either colour, attacking square (row, col)"""
+        sq = to_index(*square)
+        cells = self.cells
+        found = []
+        for step in (9, 11):
+            if cells[sq + step] == WHITE | PAWN:
+                found.append(sq + step)
+            if cells[sq - step] == BLACK | PAWN:
+                found.append(sq - step)
+        for steps, kind in ((KNIGHT_STEPS, KNIGHT), (KING_STEPS, KING)):
+            for step in steps:
+                if cells[sq + step] & TYPE_MASK == kind:
+                    found.append(sq + step)
+        for steps, kind in ((STRAIGHT, ROOK), (DIAGONAL, BISHOP)):
+            for step in steps:
+                t = sq + step
+                while cells[t] == EMPTY:
+                    t += step
+                if cells[t] & TYPE_MASK in (kind, QUEEN):
+                    found.append(t)
+        return [INDEX_TO_RC[t] for t in found]
+
+    def square_under_attack(self, r, c):
+        """Determine if the enemy can attack the square r, c"""
+        return self.is_attacked(to_index(r, c), BLACK if self.whiteToMove else WHITE)
+
+    def _pins_and_checks(self, k, us, them):
+        """Scan outward from the king; returns ({pinned index: direction}, [(checker, direction)])"""
+        cells = self.cells
+        pins = {}
+        checks = []
+        for steps, slider in ((STRAIGHT, ROOK), (DIAGONAL, BISHOP)):
+            for step in steps:
+                t = k + step
+                code = cells[t]
+                while code == EMPTY:
+                    t += step
+                    code = cells[t]
+                if code & us:
+                    shield = t
+                    t += step
+                    code = cells[t]
+                    while code == EMPTY:
+                        t += step
+                        code = cells[t]
+                    if code & them and (code & TYPE_MASK == slider or code & TYPE_MASK == QUEEN):
+                        pins[shield] = step
+                elif code & them and (code & TYPE_MASK == slider or code & TYPE_MASK == QUEEN):
+                    checks.append((t, step))
+        knight = them | KNIGHT
+        for step in KNIGHT_STEPS:
+            if cells[k + step] == knight:
+                checks.append((k + step, 0))
+        pawn = them | PAWN
+        for step in ((-9, -11) if us == WHITE else (9, 11)):
+            if cells[k + step] == pawn:
+                checks.append((k + step, 0))
+        return pins, checks
+
+    # --- Move generation ------------------------------------------------------
+
+    def generate_legal_moves(self):
+        """All legal moves. Only refreshes inCheck: no game-over flags, no draw checks, no output"""
+        return self._legal_moves()
+
+    def has_legal_move(self):
+        """True if the side to move has any legal move (the move list is built in one pass here)"""
+        return bool(self._legal_moves())
+
+    def get_capture_moves(self):
+        """Legal captures and promotions only"""
+        return self._legal_moves(captures=True)
+
+    def get_quiet_moves(self):
+        """Legal moves that neither capture nor promote (castling included)"""
+        return self._legal_moves(captures=False)
+
+    def _legal_moves(self, captures=None):
+        """Legal moves; captures=True keeps only captures and promotions, False only the rest"""
+        cells = self.cells
+        white = self.whiteToMove
+        us, them = (WHITE, BLACK) if white else (BLACK, WHITE)
+        k = self.whiteKing if white else self.blackKing
+        moves = []
+        new_move = Move.from_pieces
+        rc = INDEX_TO_RC
+
+        pins, checks = self._pins_and_checks(k, us, them)
+        self.inCheck = bool(checks)
+        quiets = captures is not True
+        tactical = captures is not False
+
+        # King steps, tested with the king lifted off its square
+        king = us | KING
+        kingName = PIECE_NAMES[king]
+        cells[k] = EMPTY
+        for step in KING_STEPS:
+            t = k + step
+            code = cells[t]
+            if ((code == EMPTY and quiets) or (code & them and tactical)) and not self.is_attacked(t, them):
+                moves.append(new_move(rc[k], rc[t], kingName, PIECE_NAMES[code]))
+        cells[k] = king
+
+        if len(checks) > 1:  # Double check: only the king can move
+            return moves
+
+        valid = None
+        if checks:
+            checker, step = checks[0]
+            valid = {checker}
+            if step:
+                t = k + step
+                while t != checker:
+                    valid.add(t)
+                    t += step
+
+        if white:
+            forward, homeRow, captureSteps = N, 8, (NW, NE)
+        else:
+            forward, homeRow, captureSteps = S, 3, (SW, SE)
+        ep = self.epSquare
+
+        for sq in SQUARES_120:
+            code = cells[sq]
+            if not code & us:
+                continue
+            kind = code & TYPE_MASK
+            if kind == KING:
+                continue
+            pin = pins.get(sq)
+            name = PIECE_NAMES[code]
+
+            if kind == PAWN:
+                promotes = cells[sq + 2 * forward] == OFFBOARD
+                if pin is None or pin == forward or pin == -forward:
+                    t = sq + forward
+                    if cells[t] == EMPTY:
+                        if (tactical if promotes else quiets) and (valid is None or t in valid):
+                            if promotes:
+                                for promotion in PROMOTION_PIECES:
+                                    moves.append(new_move(rc[sq], rc[t], name, "--", promotionPiece=promotion))
+                            else:
+                                moves.append(new_move(rc[sq], rc[t], name, "--"))
+                        t2 = t + forward
+                        if quiets and sq // 10 == homeRow and cells[t2] == EMPTY and (valid is None or t2 in valid):
+                            moves.append(new_move(rc[sq], rc[t2], name, "--"))
+                for step in captureSteps:
+                    if not tactical or (pin is not None and pin != step and pin != -step):
+                        continue
+                    t = sq + step
+                    target = cells[t]
+                    if target & them:
+                        if valid is None or t in valid:
+                            if promotes:
+                                for promotion in PROMOTION_PIECES:
+                                    moves.append(new_move(rc[sq], rc[t], name, PIECE_NAMES[target], promotionPiece=promotion))
+                            else:
+                                moves.append(new_move(rc[sq], rc[t], name, PIECE_NAMES[target]))
+                    elif t == ep and self._enpassant_is_legal(sq, t, k, us, them):
+                        moves.append(new_move(rc[sq], rc[t], name, "--", isEnPassantMove=True))
+
+            elif kind == KNIGHT:
+                if pin is not None:
+                    continue
+                for step in KNIGHT_STEPS:
+                    t = sq + step
+                    target = cells[t]
+                    if ((target == EMPTY and quiets) or (target & them and tactical)) and (valid is None or t in valid):
+                        moves.append(new_move(rc[sq], rc[t], name, PIECE_NAMES[target]))
+
+            else:
+                if kind == ROOK:
+                    steps = STRAIGHT
+                elif kind == BISHOP:
+                    steps = DIAGONAL
+                else:
+                    steps = KING_STEPS
+                for step in steps:
+                    if pin is not None and pin != step and pin != -step:
+                        continue
+                    t = sq + step
+                    target = cells[t]
+                    while target == EMPTY:
+                        if quiets and (valid is None or t in valid):
+                            moves.append(new_move(rc[sq], rc[t], name, "--"))
+                        t += step
+                        target = cells[t]
+                    if target & them and tactical and (valid is None or t in valid):
+                        moves.append(new_move(rc[sq], rc[t], name, PIECE_NAMES[target]))
+
+        if not checks and quiets:
+            self._castle_moves(k, them, kingName, moves)
+
+        return moves
+
+    def _enpassant_is_legal(self, sq, t, k, us, them):
+        """Play the capture on the cells and check that the king is safe"""
+        cells = self.cells
+        capSq = sq - sq % 10 + t % 10
+        captured = cells[capSq]
+        cells[t] = cells[sq]
+        cells[sq] = EMPTY
+        cells[capSq] = EMPTY
+        legal = not self.is_attacked(k, them)
+        cells[sq] = cells[t]
+        cells[t] = EMPTY
+        cells[capSq] = captured
+        return legal
+
+    def _castle_moves(self, k, them, kingName, moves):
+        cells = self.cells
+        rc = INDEX_TO_RC
+        if k == E1:
+            kingside, queenside = self.castling & WKS, self.castling & WQS
+        elif k == E8:
+            kingside, queenside = self.castling & BKS, self.castling & BQS
+        else:
+            return
+        if kingside and cells[k + 1] == EMPTY and cells[k + 2] == EMPTY:
+            if not self.is_attacked(k + 1, them) and not self.is_attacked(k + 2, them):
+                moves.append(Move.from_pieces(rc[k], rc[k + 2], kingName, "--", isCastleMove=True))
+        if queenside and cells[k - 1] == EMPTY and cells[k - 2] == EMPTY and cells[k - 3] == EMPTY:
+            if not self.is_attacked(k - 1, them) and not self.is_attacked(k - 2, them):
+                moves.append(Move.from_pieces(rc[k], rc[k - 2], kingName, "--", isCastleMove=True))
@@ -1,45 +1,75 @@
 """Move data structure and notation helpers."""
 
 
+# Pieces a pawn may promote to, best first
+PROMOTION_PIECES = ('Q', 'R', 'B', 'N')
+# Promotion piece -> 3-bit code stored in the packed move id
+PROMOTION_CODES = {'N': 1, 'B': 2, 'R': 3, 'Q': 4}
+
+
 class Move:
+    """
+    A move between two squares. Instances use __slots__ and carry a packed
+    integer id (from square | to square << 6 | promotion << 12, squares
+    numbered row * 8 + col) used for equality and hashing, so moves can key
+    history tables and caches. Notation strings are only built on request.
+    """
+
+    __slots__ = ("startRow", "startCol", "endRow", "endCol", "pieceMoved", "pieceCaptured",
+                 "isPawnPromotion", "promotionPiece", "isEnpassantMove", "isCastleMove", "moveID")
+
     ranksToRows = {"1": 7, "2": 6, "3": 5, "4": 4, "5": 3, "6": 2, "7": 1, "8": 0}
     rowsToRanks = {v: k for k, v in ranksToRows.items()}
     filesToCols = {"a": 0, "b": 1, "c": 2, "d": 3, "e": 4, "f": 5, "g": 6, "h": 7}
     colsToFiles = {v: k for k, v in filesToCols.items()}
 
     def __init__(self, startsq, endsq, board, isEnPassantMove=False, isCastleMove=False, promotionPiece='Q'):
-        self.startRow = startsq[0]
-        self.startCol = startsq[1]
-        self.endRow = endsq[0]
-        self.endCol = endsq[1]
-        self.pieceMoved = board[self.startRow][self.startCol] 
-        self.pieceCaptured = board[self.endRow][self.endCol]
+        self._setup(startsq, endsq, board[startsq[0]][startsq[1]], board[endsq[0]][endsq[1]],
+                    isEnPassantMove, isCastleMove, promotionPiece)
+
+    @classmethod
+    def from_pieces(cls, startsq, endsq, pieceMoved, pieceCaptured, isEnPassantMove=False, isCastleMove=False, promotionPiece='Q'):
+        """Build a move when the pieces are already known (boards that are not 8x8 lists)"""
+        move = cls.__new__(cls)
+        move._setup(startsq, endsq, pieceMoved, pieceCaptured, isEnPassantMove, isCastleMove, promotionPiece)
+        return move
+
+    def _setup(self, startsq, endsq, pieceMoved, pieceCaptured, isEnPassantMove, isCastleMove, promotionPiece):
+        startRow, startCol = startsq
+        endRow, endCol = endsq
+        self.startRow = startRow
+        self.startCol = startCol
+        self.endRow = endRow
+        self.endCol = endCol
+        self.pieceMoved = pieceMoved
 
         # Pawn promotion logic
-        self.isPawnPromotion = ((self.pieceMoved == 'wp' and self.endRow == 0) or
-                               (self.pieceMoved == 'bp' and self.endRow == 7))
+        isPawnPromotion = pieceMoved[1] == 'p' and (endRow == 0 or endRow == 7)
+        self.isPawnPromotion = isPawnPromotion
         self.promotionPiece = promotionPiece  # Default to Queen, can be 'Q', 'R', 'B', 'N'
 
-        # En passant logic
+        # En passant logic: the captured pawn is not on the destination square
         self.isEnpassantMove = isEnPassantMove
-        if self.isEnpassantMove:
-            # In en passant, the captured piece is not at the destination square
-            if self.pieceMoved == 'wp':
-                self.pieceCaptured = 'bp'
-            else:
-                self.pieceCaptured = 'wp'
+        if isEnPassantMove:
+            pieceCaptured = 'bp' if pieceMoved[0] == 'w' else 'wp'
+        self.pieceCaptured = pieceCaptured
 
         # Castle logic
         self.isCastleMove = isCastleMove
 
-        self.moveID = self.startRow * 1000 + self.startCol * 100 + self.endRow * 10 + self.endCol
+        moveID = startRow * 8 + startCol | (endRow * 8 + endCol) << 6
+        if isPawnPromotion:
+            moveID |= PROMOTION_CODES[promotionPiece] << 12
+        self.moveID = moveID
 
     def __eq__(self, other):
         """Override equals method"""
         if isinstance(other, Move):
             return self.moveID == other.moveID
         return False
-    
+
+    def __hash__(self):
+        return self.moveID
 
     def get_chess_move_notation(self):
         """Get move in algebraic notation (e.g., e2e4)"""
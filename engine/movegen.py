@@ -0,0 +1,94 @@
+"""
+Staged move generation for the search: the hash move first, then captures
+and promotions, then quiet moves. Each stage is generated only when the
+iteration reaches it, so a cutoff skips the work of the later stages.
+Within a stage, captures come most valuable victim / least valuable
+attacker first, and quiet moves follow the killer moves and history
+scores the search passes in.
+"""
+
+from .pst import PIECE_SCORES
+
+HASH_MOVE, CAPTURES, QUIETS = 0, 1, 2
+
+
+def is_tactical(move):
+    """Captures and promotions are generated in the CAPTURES stage"""
+    return move.pieceCaptured != "--" or move.isPawnPromotion
+
+
+def mvv_lva(move):
+    """Sort key for captures: the biggest victim first, taken by the cheapest attacker (lowest key first)"""
+    key = PIECE_SCORES[move.pieceMoved[1]]  # the king scores 0: its captures are always safe
+    if move.pieceCaptured != "--":
+        key -= 10 * PIECE_SCORES[move.pieceCaptured[1]]
+    if move.isPawnPromotion:
+        key -= 10 * PIECE_SCORES[move.promotionPiece]
+    return key
+
+
+def iter_moves(gs, hash_move=None, stage=QUIETS, killers=(), history=None):
+    """Yield the legal moves of gs stage by stage, up to and including `stage`.
+
+    hash_move (e.g. from the previous iteration or a transposition table) is
+    yielded first if it is legal here; it is matched against the moves of its
+    own stage so only that stage is generated early, and it is not repeated.
+    It may also be given as a Move.moveID, whose stage is unknown: captures
+    are then searched first, then quiet moves.
+
+    Captures are ordered by mvv_lva. Quiet moves start with the killers (Move
+    objects that caused a cutoff at this ply elsewhere in the tree) that are
+    legal here, then follow history[piece][row * 8 + col of the target], the
+    highest first.
+    Works with any game state exposing get_capture_moves / get_quiet_moves.
+    """
+    captures = quiets = None
+    if hash_move is not None:
+        if isinstance(hash_move, int):
+            hash_id = hash_move
+            candidates = captures = gs.get_capture_moves()
+            if stage >= QUIETS and not any(move.moveID == hash_id for move in captures):
+                candidates = quiets = gs.get_quiet_moves()
+        else:
+            hash_id = hash_move.moveID
+            if is_tactical(hash_move):
+                captures = candidates = gs.get_capture_moves()
+            elif stage >= QUIETS:
+                quiets = candidates = gs.get_quiet_moves()
+            else:
+                candidates = ()
+        for move in candidates:
+            if move.moveID == hash_id:
+                hash_move = move  # the generated copy carries this position's flags
+                yield move
+                break
+        else:
+            hash_move = None
+
+    if stage < CAPTURES:
+        return
+    if captures is None:
+        captures = gs.get_capture_moves()
+    captures.sort(key=mvv_lva)
+    for move in captures:
+        if move is not hash_move:
+            yield move
+
+    if stage < QUIETS:
+        return
+    if quiets is None:
+        quiets = gs.get_quiet_moves()
+    skip = [hash_move]
+    for killer in killers:
+        if killer is None or killer == hash_move:
+            continue
+        for move in quiets:
+            if move.moveID == killer.moveID:
+                skip.append(move)
+                yield move
+                break
+    if history is not None:
+        quiets.sort(key=lambda move: history[move.pieceMoved][move.endRow * 8 + move.endCol], reverse=True)
+    for move in quiets:
+        if move not in skip:
+            yield move
@@ -0,0 +1,145 @@
+"""
+Perft and divide: count the leaves of the legal move tree to check move
+generation against published numbers and to measure its speed.
+
+Run the reference suite from the directory containing the package:
+
+    python -m Chess.engine.perft --depth 4 --backend bitboard
+
+and check that every backend generates the same moves, root move by root
+move, with --compare.
+"""
+
+import argparse
+import sys
+import time
+
+from .bitboard import BitboardGameState
+from .fen import START_FEN
+from .game_state import GameState
+from .mailbox import MailboxGameState
+
+BACKENDS = {
+    "list": GameState,
+    "bitboard": BitboardGameState,
+    "mailbox": MailboxGameState,
+}
+
+# (name, FEN, expected node counts from depth 1 upwards)
+REFERENCE_POSITIONS = [
+    ("start", START_FEN,
+     [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("endgame-ep-pins", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    ("promotions-castling", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("promotion-checks", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+    ("pinned-pawn-push", "8/8/3K4/8/r4R2/1p3pP1/8/5k2 b - - 0 1",
+     [19, 341, 6191, 108810]),
+]
+
+
+def perft(gs, depth, bulk=True):
+    """Number of leaf nodes `depth` plies below the current position.
+
+    With bulk counting the last ply is counted from the length of the move
+    list instead of making and unmaking each move.
+    """
+    if depth == 0:
+        return 1
+    moves = gs.generate_legal_moves()
+    if depth == 1 and bulk:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        gs.make_move(move)
+        nodes += perft(gs, depth - 1, bulk)
+        gs.undo_move()
+    return nodes
+
+
+def divide(gs, depth, bulk=True):
+    """Perft split by root move: {move notation: leaf count}"""
+    counts = {}
+    for move in gs.generate_legal_moves():
+        gs.make_move(move)
+        counts[move.get_chess_move_notation()] = perft(gs, depth - 1, bulk) if depth > 1 else 1
+        gs.undo_move()
+    return counts
+
+
+def run_suite(backend=GameState, max_depth=3, bulk=True, out=sys.stdout):
+    """Run every reference position up to max_depth; returns True if all counts match"""
+    all_ok = True
+    total_nodes = 0
+    total_time = 0.0
+    for name, fen, expected in REFERENCE_POSITIONS:
+        for depth in range(1, min(max_depth, len(expected)) + 1):
+            gs = backend.from_fen(fen)
+            start = time.perf_counter()
+            nodes = perft(gs, depth, bulk)
+            elapsed = time.perf_counter() - start
+            ok = nodes == expected[depth - 1]
+            all_ok = all_ok and ok
+            total_nodes += nodes
+            total_time += elapsed
+            out.write(f"{name:22} depth {depth}  nodes {nodes:>9}  expected {expected[depth - 1]:>9}  "
+                      f"{'ok  ' if ok else 'FAIL'}  {elapsed:8.3f}s  {nodes / max(elapsed, 1e-9):>10.0f} nps\n")
+    out.write(f"total nodes {total_nodes} in {total_time:.3f}s, {total_nodes / max(total_time, 1e-9):.0f} nps\n")
+    return all_ok
+
+
+def compare_backends(fen, depth, bulk=True):
+    """Divide fen on every backend; returns {move notation: {backend name: count}} for the moves they disagree on"""
+    counts = {name: divide(backend.from_fen(fen), depth, bulk) for name, backend in BACKENDS.items()}
+    moves = set().union(*counts.values())
+    per_move = {move: {name: counts[name].get(move, 0) for name in BACKENDS} for move in moves}
+    return {move: found for move, found in per_move.items() if len(set(found.values())) > 1}
+
+
+def run_comparison(max_depth=3, bulk=True, out=sys.stdout):
+    """compare_backends on every reference position up to max_depth; returns True if the backends agree"""
+    all_ok = True
+    for name, fen, _ in REFERENCE_POSITIONS:
+        for depth in range(1, max_depth + 1):
+            mismatches = compare_backends(fen, depth, bulk)
+            all_ok = all_ok and not mismatches
+            out.write(f"{name:22} depth {depth}  {'ok' if not mismatches else 'FAIL'}\n")
+            for move in sorted(mismatches):
+                out.write(f"    {move}: {mismatches[move]}\n")
+    return all_ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perft move generation benchmark")
+    parser.add_argument("--depth", type=int, default=3, help="deepest ply to run for each position")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="list")
+    parser.add_argument("--no-bulk", action="store_true", help="make every leaf move instead of counting the last ply")
+    parser.add_argument("--fen", help="run divide on this position instead of the reference suite")
+    parser.add_argument("--compare", action="store_true", help="check that all backends divide the reference positions alike")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 0 if run_comparison(args.depth, not args.no_bulk) else 1
+
+    backend = BACKENDS[args.backend]
+    if args.fen:
+        gs = backend.from_fen(args.fen)
+        start = time.perf_counter()
+        counts = divide(gs, args.depth, not args.no_bulk)
+        elapsed = time.perf_counter() - start
+        for notation in sorted(counts):
+            print(f"{notation}: {counts[notation]}")
+        nodes = sum(counts.values())
+        print(f"\nmoves {len(counts)}  nodes {nodes}  {elapsed:.3f}s  {nodes / max(elapsed, 1e-9):.0f} nps")
+        return 0
+    return 0 if run_suite(backend, args.depth, not args.no_bulk) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
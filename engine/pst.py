@@ -0,0 +1,119 @@
+"""
+Material and piece-square tables, plus per-square lookup tables that let the
+game states keep their evaluation sums up to date move by move.
+"""
+
+# Base material scores
+PIECE_SCORES = {"K": 0, "Q": 900, "R": 500, "B": 330, "N": 320, "p": 100}
+
+# Piece-Square Tables (PST) for positional evaluation
+PST = {
+    'p': [  # Pawn
+        [0,   0,   0,   0,   0,   0,   0,   0],
+        [50,  50,  50,  50,  50,  50,  50,  50],
+        [10,  10,  20,  30,  30,  20,  10,  10],
+        [5,   5,  10,  25,  25,  10,   5,   5],
+        [0,   0,   0,  20,  20,   0,   0,   0],
+        [5,  -5, -10,   0,   0, -10,  -5,   5],
+        [5,  10,  10, -20, -20,  10,  10,   5],
+        [0,   0,   0,   0,   0,   0,   0,   0],
+    ],
+    'N': [  # Knight
+        [-50, -40, -30, -30, -30, -30, -40, -50],
+        [-40, -20,   0,   5,   5,   0, -20, -40],
+        [-30,   5,  10,  15,  15,  10,   5, -30],
+        [-30,   0,  15,  20,  20,  15,   0, -30],
+        [-30,   5,  15,  20,  20,  15,   5, -30],
+        [-30,   0,  10,  15,  15,  10,   0, -30],
+        [-40, -20,   0,   0,   0,   0, -20, -40],
+        [-50, -40, -30, -30, -30, -30, -40, -50],
+    ],
+    'B': [  # Bishop
+        [-20, -10, -10, -10, -10, -10, -10, -20],
+        [-10,   5,   0,   0,   0,   0,   5, -10],
+        [-10,  10,  10,  10,  10,  10,  10, -10],
+        [-10,   0,  10,  10,  10,  10,   0, -10],
+        [-10,   5,   5,  10,  10,   5,   5, -10],
+        [-10,   0,   5,  10,  10,   5,   0, -10],
+        [-10,   0,   0,   0,   0,   0,   0, -10],
+        [-20, -10, -10, -10, -10, -10, -10, -20],
+    ],
+    'R': [  # Rook
+        [0,   0,   5,  10,  10,   5,   0,   0],
+        [-5,   0,   0,   0,   0,   0,   0,  -5],
+        [-5,   0,   0,   0,   0,   0,   0,  -5],
+        [-5,   0,   0,   0,   0,   0,   0,  -5],
+        [-5,   0,   0,   0,   0,   0,   0,  -5],
+        [-5,   0,   0,   0,   0,   0,   0,  -5],
+        [5,  10,  10,  10,  10,  10,  10,   5],
+        [0,   0,   0,   0,   0,   0,   0,   0],
+    ],
+    'Q': [  # Queen
+        [-20, -10, -10,  -5,  -5, -10, -10, -20],
+        [-10,   0,   5,   0,   0,   0,   0, -10],
+        [-10,   5,   5,   5,   5,   5,   0, -10],
+        [ -5,   0,   5,   5,   5,   5,   0,  -5],
+        [  0,   0,   5,   5,   5,   5,   0,  -5],
+        [-10,   5,   5,   5,   5,   0,   0, -10],
+        [-10,   0,   5,   0,   0,   0,   0, -10],
+        [-20, -10, -10,  -5,  -5, -10, -10, -20],
+    ],
+    'K': [  # King (middlegame)
+        [-30, -40, -40, -50, -50, -40, -40, -30],
+        [-30, -40, -40, -50, -50, -40, -40, -30],
+        [-30, -40, -40, -50, -50, -40, -40, -30],
+        [-30, -40, -40, -50, -50, -40, -40, -30],
+        [-20, -30, -30, -40, -40, -30, -30, -20],
+        [-10, -20, -20, -20, -20, -20, -20, -10],
+        [ 20,  20,   0,   0,   0,   0,  20,  20],
+        [ 20,  30,  10,   0,   0,  10,  30,  20],
+    ]
+}
+
+# Endgame king table (when material is low)
+PST_KING_ENDGAME = [
+    [-50, -40, -30, -20, -20, -30, -40, -50],
+    [-30, -20, -10,   0,   0, -10, -20, -30],
+    [-30, -10,  20,  30,  30,  20, -10, -30],
+    [-30, -10,  30,  40,  40,  30, -10, -30],
+    [-30, -10,  30,  40,  40,  30, -10, -30],
+    [-30, -10,  20,  30,  30,  20, -10, -30],
+    [-30, -30,   0,   0,   0,   0, -30, -30],
+    [-50, -30, -30, -30, -30, -30, -30, -50],
+]
+
+
+# Game phase: 24 with all minor and major pieces on the board, 0 with none
+PHASE_WEIGHTS = {"N": 1, "B": 1, "R": 2, "Q": 4}
+MAX_PHASE = 24
+
+
+def _signed_table(piece, table):
+    """table (written from White's side) as 64 signed values for piece, indexed row * 8 + col"""
+    if piece[0] == 'w':
+        return [PIECE_SCORES[piece[1]] + table[r][c] for r in range(8) for c in range(8)]
+    return [-(PIECE_SCORES[piece[1]] + table[7 - r][c]) for r in range(8) for c in range(8)]
+
+
+_PIECES = [color + kind for color in "wb" for kind in "pNBRQK"]
+
+# MG_SCORES[piece][sq] / EG_SCORES[piece][sq]: material + PST from White's point of view.
+# Only the king has a separate endgame table.
+MG_SCORES = {piece: _signed_table(piece, PST[piece[1]]) for piece in _PIECES}
+EG_SCORES = {piece: _signed_table(piece, PST_KING_ENDGAME if piece[1] == 'K' else PST[piece[1]])
+             for piece in _PIECES}
+PHASE = {piece: PHASE_WEIGHTS.get(piece[1], 0) for piece in _PIECES}
+PHASE["--"] = 0
+
+
+def score_board(board):
+    """(middlegame sum, endgame sum, phase) of an 8x8 board, computed from scratch"""
+    mg = eg = phase = 0
+    for r in range(8):
+        for c in range(8):
+            piece = board[r][c]
+            if piece != "--":
+                mg += MG_SCORES[piece][r * 8 + c]
+                eg += EG_SCORES[piece][r * 8 + c]
+                phase += PHASE[piece]
+    return mg, eg, phase
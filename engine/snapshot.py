@@ -0,0 +1,34 @@
+"""
+Compact, immutable position snapshots.
+
+A Snapshot holds only what is needed to rebuild a position: no move log and
+no repetition counts. It is a tuple of bytes, bools and ints, so it pickles
+small and cheaply for worker processes. Any backend can restore a snapshot
+taken from any other backend.
+"""
+
+from collections import namedtuple
+
+from .castling import CastleRights
+
+# Byte value stored for each square -> piece string
+SNAPSHOT_PIECES = ["--", "wp", "wN", "wB", "wR", "wQ", "wK", "bp", "bN", "bB", "bR", "bQ", "bK"]
+SNAPSHOT_CODES = {piece: code for code, piece in enumerate(SNAPSHOT_PIECES)}
+
+# board: 64 bytes indexed row * 8 + col, castling: bits as in zobrist.castle_bits,
+# epSquare: row * 8 + col of the en passant target or -1
+Snapshot = namedtuple("Snapshot", "board whiteToMove castling epSquare halfmoveClock hash")
+
+
+def pack_squares(squares):
+    """64 piece strings in row * 8 + col order -> bytes"""
+    return bytes([SNAPSHOT_CODES[piece] for piece in squares])
+
+
+def unpack_snapshot(snapshot):
+    """Split a snapshot into (board, whiteToMove, CastleRights, enpassant, halfmoveClock), like parse_fen"""
+    data = snapshot.board
+    board = [[SNAPSHOT_PIECES[code] for code in data[r * 8:r * 8 + 8]] for r in range(8)]
+    rights = CastleRights.from_bits(snapshot.castling)
+    enpassant = divmod(snapshot.epSquare, 8) if snapshot.epSquare >= 0 else ()
+    return board, snapshot.whiteToMove, rights, enpassant, snapshot.halfmoveClock
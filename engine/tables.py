@@ -0,0 +1,52 @@
+"""
+Square tables for the list-based GameState, built once at import.
+
+Tables are indexed by row * 8 + col and hold (row, col) pairs, so the move
+generators can index the 8x8 board directly without bounds checks.
+"""
+
+ORTHOGONAL = ((-1, 0), (0, -1), (1, 0), (0, 1))
+DIAGONAL = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+DIRECTIONS = ORTHOGONAL + DIAGONAL  # RAYS[sq][i] runs along DIRECTIONS[i]
+ROOK_DIRECTIONS = range(0, 4)
+BISHOP_DIRECTIONS = range(4, 8)
+KNIGHT_STEPS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+
+
+def _jumps(r, c, steps):
+    return tuple((r + dr, c + dc) for dr, dc in steps if 0 <= r + dr < 8 and 0 <= c + dc < 8)
+
+
+def _ray(r, c, dr, dc):
+    squares = []
+    r += dr
+    c += dc
+    while 0 <= r < 8 and 0 <= c < 8:
+        squares.append((r, c))
+        r += dr
+        c += dc
+    return tuple(squares)
+
+
+# KNIGHT_TARGETS[sq] / KING_TARGETS[sq]: squares one jump / one step away
+KNIGHT_TARGETS = [_jumps(sq >> 3, sq & 7, KNIGHT_STEPS) for sq in range(64)]
+KING_TARGETS = [_jumps(sq >> 3, sq & 7, DIRECTIONS) for sq in range(64)]
+
+# RAYS[sq][i]: squares from sq (exclusive) to the edge along DIRECTIONS[i], nearest first
+RAYS = [tuple(_ray(sq >> 3, sq & 7, dr, dc) for dr, dc in DIRECTIONS) for sq in range(64)]
+
+
+def _build_lines():
+    between = [[()] * 64 for _ in range(64)]
+    direction = [[-1] * 64 for _ in range(64)]
+    for a in range(64):
+        for d, ray in enumerate(RAYS[a]):
+            for i, (r, c) in enumerate(ray):
+                between[a][r * 8 + c] = ray[:i]
+                direction[a][r * 8 + c] = d
+    return between, direction
+
+
+# BETWEEN[a][b]: squares strictly between a and b when they share a line, else ()
+# DIRECTION_INDEX[a][b]: index into DIRECTIONS of the line from a to b, or -1
+BETWEEN, DIRECTION_INDEX = _build_lines()
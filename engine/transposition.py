@@ -0,0 +1,151 @@
+"""
+Bounded transposition table for the search.
+
+Entries live in two preallocated arrays of 64-bit words sized from a
+megabyte budget, so the table never grows during a search. Each hash
+index addresses a bucket of two slots: the first keeps the deepest
+result seen (depth-preferred), the second is overwritten by every other
+store (always-replace).
+
+A slot's key word holds the position key XORed with its data word, so an
+entry only matches when both words were written together. That lets
+SharedTranspositionTable place the arrays in shared memory and have
+several processes read and write them without locks: a slot torn by two
+concurrent stores simply reads as a miss.
+"""
+
+from array import array
+from multiprocessing import shared_memory
+
+EXACT, LOWER, UPPER = 0, 1, 2  # bound type of a stored score
+
+ENTRY_BYTES = 16  # one key word and one data word
+SLOTS_PER_BUCKET = 2
+_SCORE_OFFSET = 1 << 31
+
+
+def pack_entry(depth, score, flag, move_id):
+    """Pack an entry into one 64-bit word: score (32 bits), depth (8), flag (2), move id (16)"""
+    return (score + _SCORE_OFFSET) | (depth << 32) | (flag << 40) | (move_id << 42)
+
+
+def unpack_entry(data):
+    """(depth, score, flag, move_id) from a packed data word"""
+    return ((data >> 32) & 0xFF, (data & 0xFFFFFFFF) - _SCORE_OFFSET, (data >> 40) & 3, data >> 42)
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=16):
+        self.buckets = max(1, (size_mb << 20) // (ENTRY_BYTES * SLOTS_PER_BUCKET))
+        slots = self.buckets * SLOTS_PER_BUCKET
+        self.keys = array('Q', bytes(8 * slots))
+        self.data = array('Q', bytes(8 * slots))
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0  # probes that found the bucket holding other positions
+
+    def clear(self):
+        """Forget every entry and reset the counters"""
+        slots = self.buckets * SLOTS_PER_BUCKET
+        self.keys = array('Q', bytes(8 * slots))
+        self.data = array('Q', bytes(8 * slots))
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = self.misses = self.collisions = 0
+
+    def probe(self, key):
+        """(depth, score, flag, move_id) stored for key, or None"""
+        i = (key % self.buckets) * SLOTS_PER_BUCKET
+        keys = self.keys
+        data = self.data
+        word = data[i]
+        if word and keys[i] ^ word == key:
+            self.hits += 1
+            return unpack_entry(word)
+        other = data[i + 1]
+        if other and keys[i + 1] ^ other == key:
+            self.hits += 1
+            return unpack_entry(other)
+        if word or other:
+            self.collisions += 1
+        else:
+            self.misses += 1
+        return None
+
+    def store(self, key, depth, score, flag, move_id=0):
+        """Record a search result; move_id is Move.moveID of the best move (0 for none)"""
+        i = (key % self.buckets) * SLOTS_PER_BUCKET
+        keys = self.keys
+        data = self.data
+        word = data[i]
+        if not word or keys[i] ^ word == key or depth >= (word >> 32) & 0xFF:
+            if keys[i + 1] ^ data[i + 1] == key:  # the position moves up to the depth-preferred slot
+                keys[i + 1] = data[i + 1] = 0
+            if not move_id and word and keys[i] ^ word == key:
+                move_id = word >> 42  # keep the best move of a shallower result
+        else:
+            i += 1
+        word = pack_entry(depth, score, flag, move_id)
+        data[i] = word
+        keys[i] = key ^ word
+
+    def hashfull(self):
+        """Fraction of slots in use, sampled over the first thousand buckets"""
+        sample = min(self.buckets, 1000) * SLOTS_PER_BUCKET
+        return sum(1 for word in self.data[:sample] if word) / sample
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """A TranspositionTable whose slots live in a multiprocessing.shared_memory block.
+
+    Every process holding the table (passed to a worker, or attached with
+    attach(name)) reads and writes the same entries; the hit counters stay
+    per process. The creating process should call unlink() once the table
+    is no longer needed.
+    """
+
+    def __init__(self, size_mb=16, name=None):
+        self.buckets = max(1, (size_mb << 20) // (ENTRY_BYTES * SLOTS_PER_BUCKET))
+        self._map(shared_memory.SharedMemory(name=name, create=name is None, size=self._bytes()))
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+
+    @classmethod
+    def attach(cls, name, buckets):
+        """Open the table another process created under name"""
+        table = cls.__new__(cls)
+        table.buckets = buckets
+        table._map(shared_memory.SharedMemory(name=name))
+        table.hits = table.misses = table.collisions = 0
+        return table
+
+    def __reduce__(self):
+        return SharedTranspositionTable.attach, (self.name, self.buckets)
+
+    def _bytes(self):
+        return self.buckets * SLOTS_PER_BUCKET * 8 * 2
+
+    def _map(self, shm):
+        self.shm = shm
+        self.name = shm.name
+        half = self._bytes() // 2
+        self.keys = shm.buf[:half].cast('Q')
+        self.data = shm.buf[half:2 * half].cast('Q')
+
+    def clear(self):
+        """Forget every entry, for all processes, and reset this process's counters"""
+        self.shm.buf[:self._bytes()] = bytes(self._bytes())
+        self.reset_stats()
+
+    def close(self):
+        """Detach this process from the table"""
+        self.keys.release()
+        self.data.release()
+        self.shm.close()
+
+    def unlink(self):
+        """Detach and free the shared memory block; other processes must have closed it"""
+        self.close()
+        self.shm.unlink()
@@ -0,0 +1,39 @@
+"""Zobrist keys used to hash positions incrementally.
+
+Keys come from a fixed seed so every process computes the same hash for
+the same position.
+"""
+
+import random
+
+_rng = random.Random(0x5EED_C0DE)
+
+PIECES = ["wp", "wN", "wB", "wR", "wQ", "wK",
+          "bp", "bN", "bB", "bR", "bQ", "bK"]
+
+# PIECE_KEYS[piece][row * 8 + col]
+PIECE_KEYS = {piece: [_rng.getrandbits(64) for _ in range(64)] for piece in PIECES}
+SIDE_KEY = _rng.getrandbits(64)  # XORed in when black is to move
+CASTLE_KEYS = [_rng.getrandbits(64) for _ in range(16)]  # indexed by castling bits
+EP_KEYS = [_rng.getrandbits(64) for _ in range(8)]  # indexed by en passant file
+
+
+def castle_bits(rights):
+    """Pack a CastleRights object into 4 bits (wks=1, wqs=2, bks=4, bqs=8)"""
+    return (rights.wks | (rights.wqs << 1) | (rights.bks << 2) | (rights.bqs << 3))
+
+
+def compute_hash(board, white_to_move, rights, enpassant):
+    """Hash a position from scratch (used to seed the incremental key)"""
+    h = 0
+    for r in range(8):
+        for c in range(8):
+            piece = board[r][c]
+            if piece != "--":
+                h ^= PIECE_KEYS[piece][r * 8 + c]
+    if not white_to_move:
+        h ^= SIDE_KEY
+    h ^= CASTLE_KEYS[castle_bits(rights)]
+    if enpassant:
+        h ^= EP_KEYS[enpassant[1]]
+    return h
@@ -1,13 +1,22 @@
 import pygame as p
 
 from .. import ChessEngine , MinMaxMoveFinder
-from .constants import WIDTH, HEIGHT, SQ_SIZE, MAX_FPS
+from .constants import WIDTH, HEIGHT, SQ_SIZE, MAX_FPS, BOARD_BACKEND, AI_TIME_LIMIT, AI_MAX_DEPTH
 from .assets import load_images
 from .draw import draw_game_state, drawEndGameText
 from .animation import animate_move
 from .dialogs import show_promotion_dialog
 
 
+def new_game_state():
+    """Create a game state using the configured board backend"""
+    if BOARD_BACKEND == "bitboard":
+        return ChessEngine.BitboardGameState()
+    if BOARD_BACKEND == "mailbox":
+        return ChessEngine.MailboxGameState()
+    return ChessEngine.GameState()
+
+
 def main():
     p.init()
     # Enable anti-aliasing for better graphics quality
@@ -17,7 +26,7 @@ def main():
     screen.fill(p.Color("white"))
     p.display.set_caption('Chess')
 
-    gs = ChessEngine.GameState()
+    gs = new_game_state()
     valid_moves = gs.get_valid_moves()
     move_made = False
     load_images()
@@ -150,7 +159,7 @@ def main():
                         last_move = None
 
                 if e.key == p.K_r:
-                    gs = ChessEngine.GameState()
+                    gs = new_game_state()
                     valid_moves = gs.get_valid_moves()
                     sq_selected = ()
                     player_clicks = []
@@ -162,7 +171,7 @@ def main():
         
         if not human_turn and not (gs.checkMate or gs.staleMate) and not move_made:
             
-            ai_move = MinMaxMoveFinder.find_best_move(gs)
+            ai_move = MinMaxMoveFinder.find_best_move(gs, time_limit=AI_TIME_LIMIT, max_depth=AI_MAX_DEPTH)
             if ai_move is not None:
                 gs.make_move(ai_move)
                 print('AI MOVE:', ai_move.get_chess_move_notation())
@@ -178,6 +187,9 @@ def main():
         if move_made:
             valid_moves = gs.get_valid_moves()
             print("Legal moves:", " ".join(move.get_chess_move_notation() for move in valid_moves))
+            if gs.checkMate or gs.staleMate:
+                print('PGN of the game:')
+                print(gs.get_pgn())
             if animate:
                 animate_move(last_move, screen, gs.board, clock)
             move_made = False
@@ -9,5 +9,8 @@ MAX_FPS = 15
 IMAGES = {}
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ASSETS_DIR = os.path.join(os.path.dirname(BASE_DIR), "pieces", "neo")
+BOARD_BACKEND = "list"  # "list" (GameState), "bitboard" (BitboardGameState) or "mailbox" (MailboxGameState)
+AI_TIME_LIMIT = 2.0  # seconds the AI may think per move
+AI_MAX_DEPTH = 8
 colors = [p.Color(181, 136, 99), p.Color(240, 217, 181)]
 
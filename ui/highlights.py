@@ -49,6 +49,8 @@ def highlight_selected_square(screen, r, c):
 
 def highlight_valid_moves(screen, gs, valid_moves):
     for move in valid_moves:
+        if move.isPawnPromotion and move.promotionPiece != 'Q':
+            continue  # one marker per promotion square; the piece is chosen in the dialog
         end_r, end_c = move.endRow, move.endCol
         target_piece = gs.board[end_r][end_c]
         center_x = end_c * SQ_SIZE + SQ_SIZE // 2